@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import transport
+import transfer
+
+# Download throughput of the old write loop (iter_content(1024), write,
+# hash in a second pass) against transfer.download over a single
+# stream, from a local server so the network isn't the bottleneck.
+
+
+def serve(blob: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(blob)))
+            self.end_headers()
+
+        def do_GET(self):
+            self.do_HEAD()
+            view = memoryview(blob)
+            for start in range(0, len(blob), 1024 * 1024):
+                self.wfile.write(view[start:start + 1024 * 1024])
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/blob.bin'
+
+
+def legacy(url: str, path: str):
+    response = transport.get(url, stream=True)
+    with open(path, 'wb') as file:
+        for data in response.iter_content(1024):
+            file.write(data)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for data in iter(lambda: file.read(1024 * 1024), b''):
+            sha256.update(data)
+    return sha256.hexdigest()
+
+
+def current(url: str, path: str):
+    return transfer.download(url, path, segments=1)
+
+
+def measure(name, fn, url, path, size):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    fn(url, path)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    os.remove(path)
+    mb = size / (1024 * 1024)
+    print(f'{name:22} {mb / wall:8.1f} MB/s  {cpu / mb * 1000:6.2f} ms CPU/MB')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=256, help="Size of the test file in MiB")
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    server, url = serve(os.urandom(size))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'blob.bin')
+        measure('iter_content(1024)', legacy, url, path, size)
+        measure('transfer.download', current, url, path, size)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import extract
+
+# Compares the time to find the download element of a page with a
+# full BeautifulSoup parse (what the resolvers used to do) and with
+# extract.find. Without --page a synthetic page shaped like the big
+# vendor download pages is used, with the wanted element near the end.
+
+
+def synthetic_page(sections: int = 400) -> str:
+    rows = []
+    for i in range(sections):
+        rows.append(
+            f'<div class="row" id="r{i}"><h3>Section {i}</h3>'
+            f'<p>Some <b>text</b> about release {i} with a <a href="/notes/{i}.html">changelog</a>.</p>'
+            f'<ul><li><a href="/mirror/{i}/file-{i}.zip">zip</a></li><li><img src="/i/{i}.png"></li></ul></div>'
+        )
+    rows.append('<div><a href="//get.videolan.org/vlc/3.0.20/win64/vlc-3.0.20-win64.msi">Download</a></div>')
+    rows.append('<h1>AIMP v5.30 build 2563</h1>')
+    return f'<html><head><title>Downloads</title></head><body>{"".join(rows)}</body></html>'
+
+
+def measure(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", help="Saved download page to parse")
+    parser.add_argument("--element", default="a", help="Element to look for")
+    parser.add_argument("--href", default=r'//get.videolan.org/vlc/(\d+\.\d+\.\d+)/win64/vlc-(\d+\.\d+\.\d+)-win64.msi', help="Pattern of the href")
+    parser.add_argument("--string", help="Pattern of the string, instead of --href")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page, 'rb') as file:
+            html = file.read()
+    else:
+        html = synthetic_page().encode()
+
+    href = None if args.string else re.compile(args.href)
+    string = re.compile(args.string) if args.string else None
+    print(f'Page: {len(html) / 1024:.0f} KiB, {args.repeat} runs')
+
+    element = extract.find(html, args.element, href=href, string=string)
+    print(f'extract.find        {measure(lambda: extract.find(html, args.element, href=href, string=string), args.repeat):8.2f} ms  -> {element and (element.get("href") or element.text)}')
+
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print('BeautifulSoup       skipped (beautifulsoup4 is not installed)')
+        return
+
+    def soup_find():
+        soup = BeautifulSoup(html, "html.parser")
+        return soup.find(args.element, href=href) if href else soup.find(args.element, string=string)
+
+    element = soup_find()
+    print(f'BeautifulSoup.find  {measure(soup_find, args.repeat):8.2f} ms  -> {element and (element.get("href") or element.text)}')
+
+
+if __name__ == "__main__":
+    main()
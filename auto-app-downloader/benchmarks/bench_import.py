@@ -0,0 +1,60 @@
+import os
+import sys
+import argparse
+import subprocess
+
+# Cold-start import cost of the entry points, from `python -X importtime`
+# in a fresh interpreter (best of --repeat runs). Exits with an error
+# when a module goes over its budget or imports one of the heavy
+# dependencies, which should only be loaded once they are used.
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module: budget in milliseconds
+budgets = {
+    'downloader': 100,
+    'gui': 120,
+    'catalog': 90,
+}
+heavy = ('requests', 'urllib3', 'tqdm', 'ttkbootstrap', 'bs4')
+
+
+def import_times(module: str):
+    env = dict(os.environ, PYTHONPATH=app_dir)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], env=env, cwd=app_dir, capture_output=True, text=True)
+    if result.returncode:
+        return None
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in budgets.items():
+        runs = [import_times(module) for _ in range(args.repeat)]
+        runs = [times for times in runs if times]
+        if not runs:
+            print(f'{module:12} skipped (import failed)')
+            continue
+
+        best = min(times[module] for times in runs)
+        loaded = sorted({name.split('.')[0] for name in runs[0]} & set(heavy))
+        over = best > budget
+        failed = failed or over or bool(loaded)
+        print(f'{module:12} {best:7.1f} ms  (budget {budget} ms){"  OVER BUDGET" if over else ""}')
+        if loaded:
+            print(f'{"":12} imports {", ".join(loaded)}')
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
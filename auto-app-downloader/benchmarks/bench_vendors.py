@@ -0,0 +1,126 @@
+import os
+import sys
+import copy
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import transfer
+import httpcache
+import linkcache
+import github
+import resolver
+from resolver import App, Type
+from scheduler import DownloadScheduler, State
+
+# Resolution latency of every resolver Type and end-to-end download
+# throughput against stub_vendor.py, so the numbers only change when
+# the downloader does. The stub runs in its own process to keep its
+# CPU time out of the CPU per MB figure.
+
+
+def start_stub(args):
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_vendor.py'),
+        '--latency', str(args.latency), '--bandwidth', str(args.bandwidth), '--blob-size', str(args.size),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+# One app of every Type, shaped like the catalog entries of that type
+def stub_apps(base: str):
+    return [
+        App('Direct', 'exe', f'{base}/pages/downloads.html', r'tool-([\d\.]+)-win64', Type.DIRECT.value, baseURL=base),
+        App('Static', 'exe', f'{base}/pages/news.html', r'Example Player v([\d\.]+)', Type.STATIC.value, baseURL=f'{base}/blobs/player-VERSION.exe', element='h2'),
+        App('GitHub', 'exe', 'https://api.github.com/repos/example/tool/releases/latest', r'tool-([\d\.]+)-x64', Type.GITHUB.value),
+        App('Unchanged', 'exe', f'{base}/blobs/static-latest.exe', '', Type.UNCHANGED.value),
+        App('Redirect', 'exe', f'{base}/redirect/3/blobs/redirect-2.0.1.exe', r'redirect-(\d+\.\d+\.\d+)', Type.REDIRECT.value),
+        App('UnchangedButVersion', 'exe', f'{base}/pages/news.html', r'v([\d\.]+) build', Type.UNCHANGED_BUT_VERSION.value, baseURL=f'{base}/blobs/player.exe', element='h2'),
+        App('DirectThenRedirect', 'msi', f'{base}/pages/downloads.html', r'tool-([\d\.]+)-x64', Type.DIRECT_THEN_REDIRECT.value, baseURL=base),
+    ]
+
+
+# The first resolve of an app fills the HTTP cache, the rest revalidate.
+# The link cache is off, so redirects are followed every time.
+# GitHub apps are prefetched the way the scheduler does it, which is a
+# GraphQL query with --graphql and nothing otherwise.
+def bench_resolve(apps, repeat: int):
+    print(f'{"Type":22} {"cold":>9} {"warm":>9}  version')
+    for app in apps:
+        times = []
+        for _ in range(repeat):
+            resolved = copy.copy(app)
+            started = time.perf_counter()
+            resolver.prefetch([resolved])
+            resolved.generate_link()
+            times.append((time.perf_counter() - started) * 1000)
+        warm = statistics.median(times[1:]) if len(times) > 1 else times[0]
+        result = resolved.version if resolved.link else 'FAILED'
+        print(f'{Type(app.type).name:22} {times[0]:6.2f} ms {warm:6.2f} ms  {result}')
+
+
+def bench_download(apps, workers: int):
+    done = [0]
+    lock = threading.Lock()
+
+    def download(app):
+        def progress(n, total):
+            with lock:
+                done[0] += n
+        return bool(app.fetch(app.default_path(), progress=progress))
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    scheduler = DownloadScheduler(apps, download, workers=workers)
+    scheduler.run()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+
+    for name, error in scheduler.errors.items():
+        print(f'{name} failed: {error}')
+    completed = sum(state == State.DONE for state in scheduler.states.values())
+    mb = done[0] / (1024 * 1024)
+    print(f'{completed}/{len(apps)} apps, {mb:.0f} MiB in {wall:.2f} s: {mb / wall:.1f} MB/s, {cpu / mb * 1000 if mb else 0:.2f} ms CPU/MB')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stub waits before every response")
+    parser.add_argument("--bandwidth", type=float, default=0, help="MiB/s per connection, 0 for no limit")
+    parser.add_argument("--size", type=int, default=32, help="Size of every installer in MiB")
+    parser.add_argument("--repeat", type=int, default=10, help="Resolves of every app")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent downloads")
+    parser.add_argument("--segments", type=int, default=transfer.default_segments, help="Parallel ranges per download")
+    parser.add_argument("--graphql", action="store_true", help="Resolve GitHub apps through the batched GraphQL query instead of REST")
+    args = parser.parse_args()
+
+    process, base = start_stub(args)
+    print(f'Stub at {base}, latency {args.latency * 1000:.0f} ms, bandwidth {args.bandwidth or "unlimited"} MiB/s')
+    github.api_url = base
+    # Any token works with the stub, it only selects the GraphQL path
+    github.token = 'stub' if args.graphql else ''
+    transfer.default_segments = args.segments
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            httpcache.configure(os.path.join(directory, 'cache'))
+            linkcache.configure(os.path.join(directory, 'cache', 'links.json'))
+            linkcache.enabled = False
+            App.dl_location = os.path.join(directory, 'Apps')
+            os.makedirs(App.dl_location)
+
+            apps = stub_apps(base)
+            bench_resolve(apps, args.repeat)
+            print()
+            bench_download(apps, args.workers)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
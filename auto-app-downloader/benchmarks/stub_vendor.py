@@ -0,0 +1,201 @@
+import os
+import re
+import time
+import json
+import random
+import hashlib
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A local stand-in for the vendor sites, so resolvers and downloads can
+# be measured without the network:
+#
+#   GET /pages/<file>                       fixture page (fixtures/)
+#   GET /repos/<owner>/<repo>/releases/latest   fixtures/release.json
+#   POST /graphql                           release.json for every aliased repository
+#   GET /redirect/<n>/<path>                chain of n redirects to /<path>
+#   GET /mirror/get/<name>                  redirect to /blobs/<name>
+#   GET /blobs/<name>                       synthetic installer, with Range
+#
+# `{base}` in fixtures is replaced by the url of the server. Every
+# response waits `latency` seconds first and bodies are sent at most
+# at `bandwidth` bytes per second per connection (0 for no limit).
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+range_pattern = re.compile(r'bytes=(\d*)-(\d*)$')
+alias_pattern = re.compile(r'(\w+): repository\(')
+block_size = 1024 * 1024
+
+
+class StubVendor(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes, which Nagle would hold back
+    # for a delayed ACK on kept-alive connections
+    disable_nagle_algorithm = True
+    latency = 0.0
+    bandwidth = 0
+    blob_size = 32 * 1024 * 1024
+    blocks = {}
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def base(self) -> str:
+        return f'http://{self.headers.get("Host")}'
+
+    def do_HEAD(self):
+        self.route(body=False)
+
+    def do_GET(self):
+        self.route(body=True)
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.split('?')[0] != '/graphql':
+            self.send_error(404)
+            return
+        try:
+            query = json.loads(data)['query']
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400)
+            return
+        release = json.loads(self.fixture('release.json'))
+        latest = {
+            'tagName': release['tag_name'],
+            'releaseAssets': {'nodes': [
+                {'name': asset['name'], 'downloadUrl': asset['browser_download_url']}
+                for asset in release['assets']
+            ]},
+        }
+        result = {'data': {alias: {'latestRelease': latest} for alias in alias_pattern.findall(query)}}
+        self.send_data(json.dumps(result).encode(), 'application/json', body=True)
+
+    def route(self, body: bool):
+        time.sleep(self.latency)
+        path = self.path.split('?')[0]
+        if path.startswith('/pages/'):
+            self.send_fixture(path[len('/pages/'):], 'text/html', body)
+        elif re.fullmatch(r'/repos/[^/]+/[^/]+/releases/latest', path):
+            self.send_fixture('release.json', 'application/json', body)
+        elif path.startswith('/redirect/'):
+            count, rest = path[len('/redirect/'):].split('/', 1)
+            target = f'/redirect/{int(count) - 1}/{rest}' if int(count) > 1 else f'/{rest}'
+            self.redirect(self.base + target)
+        elif path.startswith('/mirror/get/'):
+            self.redirect(f'{self.base}/blobs/{path[len("/mirror/get/"):]}')
+        elif path.startswith('/blobs/'):
+            self.send_blob(path[len('/blobs/'):], body)
+        else:
+            self.send_error(404)
+
+    def redirect(self, location: str):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def fixture(self, name: str) -> str:
+        with open(os.path.join(fixtures_dir, os.path.basename(name)), encoding='utf-8') as file:
+            return file.read().replace('{base}', self.base)
+
+    def send_fixture(self, name: str, content_type: str, body: bool):
+        if not os.path.isfile(os.path.join(fixtures_dir, os.path.basename(name))):
+            self.send_error(404)
+            return
+        self.send_data(self.fixture(name).encode(), content_type, body)
+
+    def send_data(self, data: bytes, content_type: str, body: bool):
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if body:
+            self.write(data)
+
+    # Blobs are the repeated random block of their name, so different
+    # names never have the same content
+    def block(self, name: str) -> bytes:
+        if name not in self.blocks:
+            self.blocks[name] = random.Random(name).randbytes(block_size)
+        return self.blocks[name]
+
+    def send_blob(self, name: str, body: bool):
+        size = self.blob_size
+        etag = f'"{name}-{size}"'
+        start, end = 0, size - 1
+        match = range_pattern.match(self.headers.get('Range', ''))
+        if match and match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end - start + 1))
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if not body:
+            return
+
+        block = memoryview(self.block(name))
+        offset = start
+        while offset <= end:
+            first = offset % block_size
+            n = min(block_size - first, end - offset + 1)
+            self.write(block[first:first + n])
+            offset += n
+
+    def write(self, data):
+        if not self.bandwidth:
+            self.wfile.write(data)
+            return
+        chunk = max(self.bandwidth // 20, 1024)
+        for start in range(0, len(data), chunk):
+            started = time.monotonic()
+            piece = data[start:start + chunk]
+            self.wfile.write(piece)
+            time.sleep(max(len(piece) / self.bandwidth - (time.monotonic() - started), 0))
+
+
+def create_server(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, bandwidth: int = 0, blob_size: int = StubVendor.blob_size):
+    handler = type('Handler', (StubVendor,), {
+        'latency': latency,
+        'bandwidth': bandwidth,
+        'blob_size': blob_size,
+        'blocks': {},
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before every response")
+    parser.add_argument("--bandwidth", type=float, default=0, help="MiB/s per connection, 0 for no limit")
+    parser.add_argument("--blob-size", type=int, default=32, help="Size of the installers in MiB")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.latency, int(args.bandwidth * 1024 * 1024), args.blob_size * 1024 * 1024)
+    # The first line tells a parent process where to connect
+    print(f'http://{args.host}:{server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import re
+import copy
+import json
+import threading
+from resolver import App, Type
+
+# The app catalog lives in catalog.json, shared by the CLI and the GUI.
+# It is read and validated once per process, and every entry is kept
+# as an App prototype (with its patterns already compiled) indexed by
+# name. Fresh App objects are shallow copies of the prototypes.
+catalog_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.json')
+
+# field: (type, required)
+schema = {
+    'name': (str, True),
+    'ext': (str, True),
+    'webURL': (str, True),
+    'pattern': (str, True),
+    'type': (str, True),
+    'baseURL': (str, False),
+    'element': (str, False),
+    'checked': (bool, False),
+    'category': (str, False),
+    'interval': ((int, float), False),
+    'priority': (int, False),
+    'link_ttl': ((int, float), False),
+}
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class Catalog:
+    def __init__(self, apps):
+        self.apps = apps
+        self.by_name = {app.name: app for app in apps}
+
+    def __len__(self):
+        return len(self.apps)
+
+    def __contains__(self, name: str):
+        return name in self.by_name
+
+    def names(self):
+        return [app.name for app in self.apps]
+
+    # New App objects for the given names (all apps by default), in
+    # catalog order
+    def create_apps(self, names=None):
+        if names is None:
+            return [copy.copy(app) for app in self.apps]
+        unknown = [name for name in names if name not in self.by_name]
+        if unknown:
+            raise CatalogError(f'Unknown apps: {", ".join(unknown)}')
+        wanted = set(names)
+        return [copy.copy(app) for app in self.apps if app.name in wanted]
+
+
+def validate_entry(entry, index: int) -> App:
+    where = f'catalog entry {index}'
+    if not isinstance(entry, dict):
+        raise CatalogError(f'{where} is not an object')
+    where = f'catalog entry {index} ({entry.get("name", "unnamed")})'
+
+    for field, (kind, required) in schema.items():
+        if field not in entry:
+            if required:
+                raise CatalogError(f'{where} is missing "{field}"')
+        elif not isinstance(entry[field], kind):
+            kinds = kind if isinstance(kind, tuple) else (kind,)
+            raise CatalogError(f'{where}: "{field}" must be a {" or ".join(k.__name__ for k in kinds)}')
+    unknown = set(entry) - set(schema)
+    if unknown:
+        raise CatalogError(f'{where} has unknown fields: {", ".join(sorted(unknown))}')
+
+    if entry['type'] not in Type.__members__:
+        raise CatalogError(f'{where}: unknown type "{entry["type"]}"')
+
+    fields = dict(entry, type=Type[entry['type']].value)
+    try:
+        return App(**fields)
+    except re.error as e:
+        raise CatalogError(f'{where}: invalid pattern: {e}')
+
+
+def parse(data) -> Catalog:
+    if not isinstance(data, list):
+        raise CatalogError('catalog must be a list of apps')
+    apps = [validate_entry(entry, index) for index, entry in enumerate(data)]
+
+    names = set()
+    for app in apps:
+        if app.name in names:
+            raise CatalogError(f'Duplicate app in catalog: {app.name}')
+        names.add(app.name)
+    return Catalog(apps)
+
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def load(path: str = catalog_path) -> Catalog:
+    path = os.path.abspath(path)
+    with _lock:
+        if path not in _catalogs:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    data = json.load(file)
+            except OSError as e:
+                raise CatalogError(f'Cannot read catalog {path}: {e.strerror}')
+            except ValueError as e:
+                raise CatalogError(f'{path} is not valid JSON: {e}')
+            _catalogs[path] = parse(data)
+        return _catalogs[path]
+
+
+def get_app_list(path: str = catalog_path):
+    return load(path).create_apps()
@@ -0,0 +1,45 @@
+import re
+import httpcache
+
+# Names of checksum files published next to release assets
+checksum_suffixes = ('.sha256', '.sha256sum', '.sha256.txt')
+checksum_files = re.compile(r'(^|[-_.])(sha256sums?|checksums?)(\.txt)?$', re.IGNORECASE)
+sha256_pattern = re.compile(r'\b([0-9a-fA-F]{64})\b')
+
+
+# Find the digest of `filename` in the text of a checksum file. Lines
+# look like `<hash>  <filename>` (sha256sum) or just `<hash>` when the
+# file only covers a single asset.
+def parse_checksums(text: str, filename: str, single_asset: bool = False) -> str:
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines:
+        match = sha256_pattern.search(line)
+        if match and line.split()[-1].lstrip('*') == filename:
+            return match.group(1).lower()
+    if single_asset and len(lines) == 1:
+        match = sha256_pattern.search(lines[0])
+        if match:
+            return match.group(1).lower()
+    return ''
+
+
+# Expected SHA-256 of a GitHub release asset, either from the `digest`
+# field of the asset or from a checksum file in the same release
+def github_sha256(release: dict, asset: dict) -> str:
+    digest = asset.get('digest') or ''
+    if digest.startswith('sha256:'):
+        return digest[len('sha256:'):].lower()
+
+    name = asset['name']
+    for candidate in release.get('assets', []):
+        candidate_name = candidate['name']
+        single_asset = candidate_name in (name + suffix for suffix in checksum_suffixes)
+        if single_asset or checksum_files.search(candidate_name):
+            try:
+                text = httpcache.get(candidate['browser_download_url']).decode(errors='replace')
+            except Exception:
+                continue
+            sha256 = parse_checksums(text, name, single_asset)
+            if sha256:
+                return sha256
+    return ''
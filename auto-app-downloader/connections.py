@@ -0,0 +1,48 @@
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import metrics
+
+
+# Connections that report their connect and TLS handshake times to
+# the metrics record of the thread opening them
+class TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            metrics.add('connect', time.perf_counter() - started)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    tcp_time = 0.0
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self.tcp_time = time.perf_counter() - started
+            metrics.add('connect', self.tcp_time)
+
+    def connect(self):
+        started = time.perf_counter()
+        self.tcp_time = 0.0
+        super().connect()
+        metrics.add('tls', time.perf_counter() - started - self.tcp_time)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
@@ -1,347 +1,210 @@
-import os
 import sys
-import re
-from urllib import request
-import requests
 import argparse
-import json
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-from enum import Enum
-
-class Type(Enum):
-    DIRECT = 1
-    STATIC = 2
-    GITHUB = 3
-    UNCHANGED = 4
-    REDIRECT = 5
-    UNCHANGED_BUT_VERSION = 6
-
-class App:
-    dl_location: str = ''
-    version_pattern = r'([\d\.]+)'
-    user_agent = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/113.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-    }
-
-    def __init__(self, name: str, ext: str, webURL: str, pattern: str, type: int, baseURL: str = '', element: str = 'a'):
-        self.name = name
-        self.version = ''
-        self.ext = ext
-        self.webURL = webURL
-        self.pattern = pattern
-        self.type = type
-        self.element = element
-        self.link: str = ''
-        self.baseURL = baseURL
-        self.element = element
-
-    def generate_link(self):
-        if self.type == 1:
-            self.__get_link()
-        elif self.type == 2:
-            self.__make_link_with_version()
-        elif self.type == 3:
-            self.__get_link_from_github()
-        elif self.type == 4:
-            self.__direct_link()
-        elif self.type == 5:
-            self.__redirect_link()
-        elif self.type == 6:
-            self.__direct_link_but_version()
-        else:
-            print('Type doesn\'t exist!')
-
-
-    # Generate links for different types
-    def hit_request(self, url, stream: bool = None):
-        return requests.get(url, headers=App.user_agent, stream=stream)
-
-    def __fetch_soup(self):
-        return BeautifulSoup(self.hit_request(self.webURL).content, "html.parser")
-
-    # TYPE: 1
-    # If the webURL page has direct link inside the 'a' tag
-    def __get_link(self):
-        soup = self.__fetch_soup()
-        element = soup.find(self.element, href=re.compile(f'{self.pattern}.{self.ext}'))
-        if not element:
-            print(f'{self.name} with .{self.ext} extension not found!')
+import transport
+import transfer
+import catalog
+import store
+import metrics
+import scheduler
+import linkcache
+import resolver
+from resolver import App
+from manifest import open_manifest, unversioned
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Resolve links of all apps using a bounded pool of workers.
+# Results keep the catalog order, so the total time is set by
+# the slowest site rather than the sum of all of them.
+def resolve_links(app_list, jobs: int = 1):
+    def resolve(app):
+        try:
+            app.generate_link()
+        except Exception as e:
+            print(f'Failed to generate link for {app.name}: {e}')
+        return app
+
+    resolver.prefetch(app_list)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return list(executor.map(resolve, app_list))
+
+# Print the downloads recorded in the manifest since the given date
+def print_changes(dl_location: str, since: datetime):
+    for row in open_manifest(dl_location).changed_since(since.timestamp()):
+        downloaded_at = datetime.fromtimestamp(row['downloaded_at']).strftime('%Y-%m-%d %H:%M')
+        print(f'{downloaded_at}  {row["app"]} {row["version"]}')
+
+# How a resolved app compares with its latest download. Unversioned
+# links can only be compared by the size a HEAD reports.
+def update_status(app, manifest) -> str:
+    if not app.link:
+        return 'failed'
+    latest = manifest.latest(app.name)
+    if not latest:
+        return 'new'
+    if app.version not in unversioned:
+        if not manifest.latest(app.name, app.version):
+            return 'update'
+        return 'current' if manifest.is_present(app.name, app.version) else 'missing'
+    size = transfer.probe(app.link).size
+    if not size:
+        return 'unknown'
+    return 'current' if size == latest['size'] else 'update'
+
+def load_apps(args):
+    try:
+        return catalog.load(args.catalog).create_apps(args.apps)
+    except catalog.CatalogError as e:
+        print(f'    - {e}')
+        sys.exit(1)
+
+def print_stats():
+    for host, stat in transport.stats().items():
+        print(f'{host}: {stat["requests"]} requests over {stat["connections"]} connections')
+
+def run(args):
+    if args.changed_since:
+        print_changes(args.dl, args.changed_since)
+        return
+
+    # A failed download is reported and the rest of the apps still run
+    for app in scheduler.order(resolve_links(load_apps(args), args.jobs), jobs=args.jobs):
+        try:
+            app.download()
+        except Exception as e:
+            print(f'Failed to download {app.name}: {e}')
+
+    metrics.write_prometheus()
+    if args.stats:
+        print_stats()
+
+# Resolve everything and report what is outdated, without downloading
+def check(args):
+    apps = resolve_links(load_apps(args), args.jobs)
+    manifest = open_manifest(args.dl)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        statuses = list(executor.map(lambda app: update_status(app, manifest), apps))
+
+    width = max((len(app.name) for app in apps), default=len('App')) + 2
+    print(f'{"App":{width}}{"Local":16}{"Available":16}Status')
+    for app, status in zip(apps, statuses):
+        latest = manifest.latest(app.name)
+        local = latest['version'] if latest else '-'
+        print(f'{app.name:{width}}{local:16}{app.version or "-":16}{status}')
+
+    counts = {status: statuses.count(status) for status in dict.fromkeys(statuses)}
+    print(', '.join(f'{count} {status}' for status, count in counts.items()))
+
+    metrics.write_prometheus()
+    if args.stats:
+        print_stats()
+
+# Bytes per second from a number with an optional K, M or G suffix,
+# 0 for no limit
+def parse_rate(text: str) -> int:
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    try:
+        if text and text[-1] in units:
+            rate = int(float(text[:-1]) * units[text[-1]])
         else:
-            url = element.get("href")
-            self.link = self.baseURL + url
-            match = re.search(f'{self.pattern}.{self.ext}', url)
-            self.version = match.group(1) if match else 'Unknown'
-
-    # TYPE: 2
-    # If the webURL page doesn't contain the direct link
-    # However, we know a static link(baseURL) that only differ in version number
-    # for different release. So, we find the version from
-    # the webURL and replace that inside baseURL.
-    def __make_link_with_version(self):
-        soup = self.__fetch_soup()
-        element = soup.find(self.element, string=re.compile(self.pattern))
-        version = re.search(App.version_pattern, element.text).group(1)
-        
-        if not element or not version:
-            print(f'{self.name} with .{self.ext} extension not found!')
-        else:
-            self.link = self.baseURL.replace('VERSION', version)
-            self.version = version
-
-    # TYPE: 3
-    # App release is available on github
-    # so get the link using github rest api
-    def __get_link_from_github(self):
-        release = json.loads(self.hit_request(self.webURL).content)
-        assets = release['assets']
-
-        for asset in assets:
-            if re.search(f'{self.pattern}.{self.ext}', asset['browser_download_url']):
-                self.link = asset['browser_download_url']
-                self.version = release['tag_name']
-                break
-        
-        if not self.link:
-            print(f'{self.name} with .{self.ext} extension not found!')
-
-    # TYPE: 4
-    # Direct unchangeable Link
-    def __direct_link(self):
-        self.link = self.webURL
-        self.version = 'Latest'
-
-    # TYPE: 5
-    # Not direct link. But will redirect to the direct link
-    # so, we are catching that here.
-    def __redirect_link(self):
-        req = request.Request(self.webURL, headers=App.user_agent)
-        self.link = request.build_opener().open(req).geturl()
-        # print(self.link)
-        if self.link:
-            # check if version is fixed
-            if self.pattern.startswith('@FIXED '):
-                self.version = self.pattern.replace('@FIXED ', '')
-            else:
-                match = re.search(self.pattern, self.link)
-                if match:
-                    self.version = match.group(1)
-        else:
-            print('Failed to generate link')
-
-    # TYPE: 6
-    # unchangeable direct link is available but version
-    # is on a different page
-    def __direct_link_but_version(self):
-        self.link = self.baseURL
-        soup = self.__fetch_soup()
-        element = soup.find(self.element, string=re.compile(self.pattern))
-        if not element:
-            print(f'version of .{self.name} not found!')
-        else:
-            match = re.search(self.pattern, element.get_text())
-            if match:
-                self.version = match.group(1)
-
-    def download(self, path: str = None):
-        print(f"\t -> {self}")
-        if App.dl_location:
-            path = os.path.join(App.dl_location, f'{self.name}_{self.version}.{self.ext}')
-
-        if not path and not App.dl_location:
-            path = f'{self.name}_{self.version}.{self.ext}'
-
-        if self.link:
-            response = self.hit_request(self.link, stream=True)
-
-            total_size = int(response.headers.get('content-length', 0))
-            block_size = 1024 # 1 Kibibyte
-            tqdm_bar = tqdm(total=total_size, unit='iB', unit_scale=True)
-
-            with open(path, 'wb') as file:
-                for data in response.iter_content(block_size):
-                    tqdm_bar.update(len(data))
-                    file.write(data)
-            tqdm_bar.close()
-        else:
-            print('Please generate link first!')
-
-    def __str__(self) -> str:
-        v = 'v' if 'v' not in self.version else ''
-        return f'{self.name} {v}{self.version}.{self.ext}'
-
-
-def get_app_list():
-    return [
-            App(
-                '7zip',
-                'msi',
-                'https://www.7-zip.org/download.html',
-                r'.*?(\d{1,})-x64',
-                Type.DIRECT.value,
-                'https://www.7-zip.org/'
-            ),
-            App(
-                'WinRAR',
-                'exe',
-                'https://www.rarlab.com/download.htm',
-                r'.*?winrar.*?64-(.*?)',
-                Type.DIRECT.value,
-                'https://www.rarlab.com/'
-            ),
-            App(
-                'ImageGlass',
-                'msi', 
-                'https://api.github.com/repos/d2phap/ImageGlass/releases/latest', 
-                r'ImageGlass_Kobe.*?64',
-                Type.GITHUB.value
-            ),
-            App(
-                'OBS Studio',
-                'exe', 
-                'https://api.github.com/repos/obsproject/obs-studio/releases/latest', 
-                r'OBS-Studio-(.*?)-Full-Installer-x64',
-                Type.GITHUB.value
-            ),
-            App(
-                'SumatraPDF',
-                'exe',
-                'https://www.sumatrapdfreader.org/download-free-pdf-viewer',
-                r'.*?SumatraPDF-(.*?)-64-install',
-                Type.DIRECT.value,
-                'https://www.sumatrapdfreader.org/'
-            ),
-            App(
-                'AIMP Audio Player',
-                'exe',
-                'https://www.aimp.ru/?do=download&os=windows',
-                r'AIMP v.*?',
-                Type.STATIC.value,
-                'https://aimp.ru/files/windows/builds/aimp_VERSION_w64.exe',
-                'h1'
-            ),
-            App(
-                'Chrome',
-                'msi',
-                'https://chromeenterprise.google/browser/download/thank-you/?platform=WIN64_MSI&channel=stable&usagestats=0',
-                '@FIXED Latest',
-                Type.REDIRECT.value
-            ),
-            App(
-                'FireFox',
-                'exe',
-                'https://download.mozilla.org/?product=firefox-latest&os=win64&lang=en-US',
-                r'/([\d.]+[a-z]*\d*)/',
-                Type.REDIRECT.value
-            ),
-            App(
-                'Github Desktop',
-                'exe',
-                'https://central.github.com/deployments/desktop/desktop/latest/win32?format=exe',
-                r'/([\d.a-z-]+)/(GitHubDesktopSetup-x64)',
-                Type.REDIRECT.value
-            ),
-            App(
-                'VSCode',
-                'exe',
-                'https://code.visualstudio.com/sha/download?build=stable&os=win32-x64',
-                r'-([\d\.]+)',
-                Type.REDIRECT.value
-            ),
-            App(
-                'Discord',
-                'exe',
-                'https://discord.com/api/downloads/distributions/app/installers/latest?channel=stable&platform=win&arch=x86',
-                r'/(\d+(\.\d+)+)/',
-                Type.REDIRECT.value
-            ),
-            App(
-                'Notepad++',
-                'exe',
-                'https://api.github.com/repos/notepad-plus-plus/notepad-plus-plus/releases/latest',
-                r'npp\.(\d+\.)+\d+\.Installer\.x64',
-                Type.GITHUB.value
-            ),
-            App(
-                'SublimeText',
-                'exe',
-                'https://www.sublimetext.com/download',
-                r'Build .*?',
-                Type.STATIC.value,
-                'https://download.sublimetext.com/sublime_text_build_VERSION_x64_setup.exe',
-                'h3'
-            ),
-            App(
-                'QBitTorrent',
-                'exe',
-                'https://www.qbittorrent.org/download',
-                r'Latest: .*?',
-                Type.STATIC.value,
-                'https://altushost-swe.dl.sourceforge.net/project/qbittorrent/qbittorrent-win32/qbittorrent-VERSION/qbittorrent_VERSION_x64_setup.exe',
-            ),
-            App(
-                'VLC Player',
-                'msi',
-                'https://www.videolan.org/vlc/download-windows.html',
-                r'//get.videolan.org/vlc/(\d+\.\d+\.\d+)/win64/vlc-(\d+\.\d+\.\d+)-win64',
-                Type.DIRECT.value,
-                'https:'
-            ),
-            App(
-                'Brave Browser',
-                'exe',
-                'https://api.github.com/repos/brave/brave-browser/releases/latest',
-                r'BraveBrowserStandaloneSetup',
-                Type.GITHUB.value
-            ),
-            App(
-                'Anydesk',
-                'exe',
-                'https://anydesk.com/en/downloads/windows',
-                r'v([\d.]+)',
-                Type.UNCHANGED_BUT_VERSION.value,
-                'https://download.anydesk.com/AnyDesk.exe',
-                'div'
-            ),
-            App(
-                'Telegram',
-                'exe', 
-                'https://api.github.com/repos/telegramdesktop/tdesktop/releases/latest', 
-                r'/tsetup-x64\.(.*?)',
-                Type.GITHUB.value
-            ),
-            App(
-                'Zoom',
-                'exe',
-                'https://zoom.us/client/latest/ZoomInstaller.exe',
-                r'/([\d.]+[a-z]*\d*)/',
-                Type.REDIRECT.value
-            ),
-    ]
-
-def main():
-    App.dl_location = dl_location
-
-    app_list = get_app_list()
-
-    for app in app_list:
-        app.generate_link()
-        # app.download()
-        print(app)
-        
-
-
-# Get download location from command line arguments
-parser = argparse.ArgumentParser()
-parser.add_argument("dl", help="Download location")
-args = parser.parse_args()
-dl_location = args.dl
-
-# exit if no args given
-if not dl_location:
-    print("    - Please enter a download location.")
-    sys.exit(1)
+            rate = int(float(text))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid rate: {text}')
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f'rate can\'t be negative: {text}')
+    return rate
+
+def positive_int(text: str) -> int:
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid number: {text}')
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1: {text}')
+    return value
+
+commands = ('run', 'check', 'serve', 'watch')
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command")
+
+    location = argparse.ArgumentParser(add_help=False)
+    location.add_argument("dl", help="Download location")
+
+    # Options of the commands that resolve and download apps
+    apps = argparse.ArgumentParser(add_help=False)
+    apps.add_argument("--catalog", default=catalog.catalog_path, help="App catalog file")
+    apps.add_argument("--app", dest="apps", action="append", metavar="NAME", help="Only this app from the catalog (can be repeated)")
+    apps.add_argument("--mirror", default=App.mirror, metavar="URL", help="LAN mirror to resolve apps from before the vendors")
+    apps.add_argument("-j", "--jobs", type=int, default=8, help="Number of apps to resolve concurrently")
+    apps.add_argument("--segments", type=int, default=transfer.default_segments, help="Parallel ranges used for large downloads, 1 to disable")
+    apps.add_argument("--order", choices=scheduler.policies, default=scheduler.default_policy, help="Download order: smallest first (sjf), largest first, catalog order or catalog priority")
+    apps.add_argument("--limit-rate", type=parse_rate, default=transfer.rate_limit, metavar="RATE", help="Cap on the combined download speed, e.g. 500K or 2M per second, 0 for no limit")
+    apps.add_argument("--keep", type=positive_int, default=store.keep_versions, help="Versions of each app kept in the download location")
+    apps.add_argument("--timeout", type=float, default=transport.read_timeout, metavar="SECONDS", help="Give up on a connection that sends nothing for this long")
+    apps.add_argument("--retries", type=int, default=transport.retries, help="Retries of failed requests")
+    apps.add_argument("--hedge", type=float, default=transport.hedge_delay, metavar="SECONDS", help="Send a second copy of resolver requests slower than this, 0 to disable")
+    apps.add_argument("--metrics", default=metrics.path, metavar="FILE", help="Append phase timings of every app to FILE as JSON lines, and keep a Prometheus text file next to it")
+    apps.add_argument("--refresh", action="store_true", help="Resolve every app again instead of reusing recently resolved links")
+    apps.add_argument("--stats", action="store_true", help="Print requests and connections per host")
+
+    run = subparsers.add_parser("run", parents=[location, apps], help="Resolve and download the catalog (default command)")
+    run.add_argument("--changed-since", type=datetime.fromisoformat, metavar="DATE", help="List downloads recorded since DATE (YYYY-MM-DD) and exit")
+
+    subparsers.add_parser("check", parents=[location, apps], help="Report apps with newer versions than the download location has")
+
+    serve = subparsers.add_parser("serve", parents=[location], help="Publish the download location as a LAN mirror")
+    serve.add_argument("--host", default="0.0.0.0", help="Address to listen on")
+    serve.add_argument("--port", type=int, default=8080, help="Port to listen on")
+
+    watcher = subparsers.add_parser("watch", parents=[location, apps], help="Keep checking the catalog and download new versions")
+    watcher.add_argument("--interval", type=float, metavar="HOURS", help="Hours between checks of apps without their own interval (default 6)")
+    watcher.add_argument("--jitter", type=float, help="Fraction of the interval a check may randomly move by (default 0.1)")
+    watcher.add_argument("--workers", type=int, default=2, help="Number of concurrent downloads")
+
+    # `downloader.py DL` is the same as `downloader.py run DL`
+    if not argv or argv[0] not in commands + ('-h', '--help'):
+        argv = ['run'] + argv
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    # Get download location from command line arguments
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    # exit if no args given
+    if not args.dl:
+        print("    - Please enter a download location.")
+        sys.exit(1)
+
+    App.dl_location = args.dl
+    if args.command == 'serve':
+        import mirror
+        mirror.serve(args.dl, args.host, args.port)
+        return
+
+    App.mirror = args.mirror
+    transport.read_timeout = args.timeout
+    transport.retries = max(args.retries, 0)
+    transport.hedge_delay = args.hedge
+    metrics.path = args.metrics
+    linkcache.enabled = not args.refresh
+    transfer.default_segments = args.segments
+    transfer.rate_limit = args.limit_rate
+    scheduler.default_policy = args.order
+    store.keep_versions = args.keep
+    if args.command == 'watch':
+        import watch
+        if args.interval:
+            watch.interval = args.interval * 3600
+        if args.jitter is not None:
+            watch.jitter = min(max(args.jitter, 0), 1)
+        watch.Watcher(load_apps(args), args.dl, args.workers, args.jobs).run()
+    elif args.command == 'check':
+        check(args)
+    else:
+        run(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,110 @@
+from html.parser import HTMLParser
+
+# Finds the first element of a download page matching a tag and an
+# href or string pattern, like `soup.find(tag, href=...)` or
+# `soup.find(tag, string=...)`, without building a tree of the page.
+# The page is tokenized once, only elements of the wanted tag (and
+# what is nested in them) are tracked, and parsing stops at the first
+# match.
+
+void_elements = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+
+
+class Element:
+    def __init__(self, tag: str, attrs: dict, text: str = ''):
+        self.tag = tag
+        self.attrs = attrs
+        self.text = text
+
+    def get(self, name: str, default=None):
+        return self.attrs.get(name, default)
+
+    def get_text(self) -> str:
+        return self.text
+
+
+class _Node:
+    # An open element inside a wanted element. Like bs4's `.string`,
+    # `string` is only set while the node has exactly one child that
+    # is itself a string (or has one).
+    def __init__(self, tag: str, attrs: dict, target: bool):
+        self.tag = tag
+        self.attrs = attrs
+        self.target = target
+        self.children = 0
+        self.string = None
+
+    def add_child(self, string):
+        self.children += 1
+        self.string = string if self.children == 1 else None
+
+
+class _Found(Exception):
+    pass
+
+
+class _Finder(HTMLParser):
+    def __init__(self, tag: str, href=None, string=None):
+        super().__init__(convert_charrefs=True)
+        self.tag = tag
+        self.href = href
+        self.string = string
+        self.stack = []
+        self.found = None
+
+    def handle_starttag(self, tag, attrs):
+        target = tag == self.tag
+        if target and self.href is not None:
+            attrs = dict(attrs)
+            href = attrs.get('href')
+            if href is not None and self.href.search(href):
+                self.found = Element(tag, attrs)
+                raise _Found
+            return
+        if not target and not self.stack:
+            return
+
+        if self.stack:
+            self.stack[-1].add_child(None)
+        if tag not in void_elements:
+            self.stack.append(_Node(tag, dict(attrs) if target else None, target))
+
+    def handle_endtag(self, tag):
+        if tag is not None and not any(node.tag == tag for node in self.stack):
+            return
+        # Elements left open are closed by the end tag of their parent
+        while self.stack:
+            node = self.stack.pop()
+            if self.stack and self.stack[-1].children == 1:
+                self.stack[-1].string = node.string
+            if node.target and node.string is not None and self.string.search(node.string):
+                self.found = Element(node.tag, node.attrs, node.string)
+                raise _Found
+            if node.tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.stack:
+            self.stack[-1].add_child(data)
+
+
+def _decode(html) -> str:
+    # Only ascii patterns are matched, so a lossy decode is fine
+    return html.decode('utf-8', errors='replace') if isinstance(html, bytes) else html
+
+
+# First `tag` element whose href matches the compiled `href` pattern,
+# or whose string matches the compiled `string` pattern
+def find(html, tag: str, href=None, string=None):
+    finder = _Finder(tag, href, string)
+    try:
+        finder.feed(_decode(html))
+        finder.close()
+        # Close whatever is still open at the end of the page
+        finder.handle_endtag(None)
+    except _Found:
+        pass
+    return finder.found
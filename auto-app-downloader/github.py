@@ -0,0 +1,148 @@
+import os
+import re
+import json
+import time
+import threading
+import transport
+import httpcache
+
+# Latest releases of GitHub-hosted apps. With a token (GITHUB_TOKEN)
+# prefetch() asks for the releases of all of them in one GraphQL query
+# per batch_size repositories; without one every app makes its own
+# REST call, through the HTTP cache so unchanged releases cost a 304,
+# and the calls wait for the rate limit window when it runs out.
+#
+# Releases are returned in the shape of the REST API, so the resolver
+# and checksum.github_sha256 don't care where they came from. GraphQL
+# assets have no digest; their checksum comes from checksum files.
+#
+# GITHUB_API_URL points everything at another server, e.g. a stub.
+api_url = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+token = os.environ.get('GITHUB_TOKEN', '')
+# Repositories per GraphQL query
+batch_size = 25
+# Longest wait for the rate limit to reset before giving up
+max_rate_limit_wait = 60
+
+repo_pattern = re.compile(r'/repos/([^/]+)/([^/]+)/releases/latest')
+
+query_template = '''
+  r{index}: repository(owner: {owner}, name: {name}) {{
+    latestRelease {{
+      tagName
+      releaseAssets(first: 100) {{ nodes {{ name downloadUrl }} }}
+    }}
+  }}'''
+
+
+class RateLimited(Exception):
+    pass
+
+
+_releases = {}
+_remaining = None
+_reset = 0.0
+_lock = threading.Lock()
+
+
+def repo_of(url: str):
+    match = repo_pattern.search(url)
+    return match.groups() if match else None
+
+
+def auth_headers() -> dict:
+    return {'Authorization': f'bearer {token}'} if token else {}
+
+
+# Fetch the releases of the given release urls in as few GraphQL
+# queries as possible. Only done with a token; anything not found here
+# is fetched over REST by release().
+def prefetch(urls):
+    if not token:
+        return
+    repos = {}
+    for url in urls:
+        repo = repo_of(url)
+        if repo:
+            repos.setdefault(repo, []).append(url)
+
+    repos = list(repos.items())
+    for start in range(0, len(repos), batch_size):
+        batch = repos[start:start + batch_size]
+        try:
+            data = _graphql(batch)
+        except Exception as e:
+            print(f'GitHub GraphQL query failed, using REST: {e}')
+            return
+        for index, (repo, repo_urls) in enumerate(batch):
+            release = ((data.get(f'r{index}') or {}).get('latestRelease'))
+            if release:
+                with _lock:
+                    for url in repo_urls:
+                        _releases[url] = _from_graphql(release)
+
+
+def _graphql(batch) -> dict:
+    fields = ''.join(
+        query_template.format(index=index, owner=json.dumps(owner), name=json.dumps(name))
+        for index, ((owner, name), urls) in enumerate(batch)
+    )
+    response = transport.request('POST', f'{api_url}/graphql', json={'query': f'query {{{fields}\n}}'}, headers=auth_headers())
+    response.raise_for_status()
+    result = response.json()
+    if result.get('data') is None:
+        raise ValueError(result.get('errors') or 'no data')
+    return result['data']
+
+
+def _from_graphql(release: dict) -> dict:
+    return {
+        'tag_name': release['tagName'],
+        'assets': [
+            {'name': asset['name'], 'browser_download_url': asset['downloadUrl']}
+            for asset in release['releaseAssets']['nodes']
+        ],
+    }
+
+
+# Latest release behind a `/repos/<owner>/<repo>/releases/latest` url.
+# A prefetched release is used once, so later checks see new releases.
+def release(url: str) -> dict:
+    with _lock:
+        if url in _releases:
+            return _releases.pop(url)
+
+    repo = repo_of(url)
+    if repo:
+        url = f'{api_url}/repos/{repo[0]}/{repo[1]}/releases/latest'
+    _wait_for_rate_limit()
+    content, response = httpcache.fetch(url, auth_headers())
+    _update_rate_limit(response)
+    if response.status_code == 403 and _remaining == 0:
+        raise RateLimited('GitHub API rate limit exceeded')
+    if not response.ok and response.status_code != 304:
+        raise ValueError(f'GitHub API returned {response.status_code} for {url}')
+    return json.loads(content)
+
+
+def _update_rate_limit(response):
+    global _remaining, _reset
+    remaining = response.headers.get('x-ratelimit-remaining', '')
+    reset = response.headers.get('x-ratelimit-reset', '')
+    if remaining.isdigit():
+        with _lock:
+            _remaining = int(remaining)
+            _reset = float(reset) if reset.isdigit() else 0.0
+
+
+# Hold REST calls until the rate limit window resets when it's used
+# up, if that happens soon enough
+def _wait_for_rate_limit():
+    with _lock:
+        if _remaining is None or _remaining > 0:
+            return
+        wait = _reset - time.time()
+    if wait > max_rate_limit_wait:
+        raise RateLimited(f'GitHub API rate limit exceeded, resets in {int(wait)}s')
+    if wait > 0:
+        time.sleep(wait)
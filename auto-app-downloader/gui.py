@@ -1,175 +1,95 @@
 import os
-import re
 import tkinter as tk
 from tkinter import ttk
-from ttkbootstrap import Style
 import threading
-import requests
-import json
-from bs4 import BeautifulSoup
 import tkinter.messagebox as messagebox
-from enum import Enum
-
-
-class Type(Enum):
-    DIRECT = 1
-    STATIC = 2
-    GITHUB = 3
-    UNCHANGED = 4
-    REDIRECT = 5
-    UNCHANGED_BUT_VERSION = 6
-    DIRECT_THEN_REDIRECT = 7
-
-
-class App:
-    dl_location: str = f'{os.getcwd()}/Apps' 
-    version_pattern = r'([\d\.]+)'
-    user_agent = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/113.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-    }
-
-    def __init__(self, name: str, ext: str, webURL: str, pattern: str, type: int, baseURL: str = '', element: str = 'a', checked=False):
-        self.name = name
-        self.version = ''
-        self.ext = ext
-        self.webURL = webURL
-        self.pattern = pattern
-        self.type = type
-        self.element = element
-        self.link: str = ''
-        self.baseURL = baseURL
-        self.element = element
-        self.checked = checked
-
-    def generate_link(self):
-        if self.type == 1:
-            self.__get_link()
-        elif self.type == 2:
-            self.__make_link_with_version()
-        elif self.type == 3:
-            self.__get_link_from_github()
-        elif self.type == 4:
-            self.__direct_link()
-        elif self.type == 5:
-            self.__redirect_link()
-        elif self.type == 6:
-            self.__direct_link_but_version()
-        elif self.type == 7:
-            self.__get_link_then_redirect()
-        else:
-            print('Type doesn\'t exist!')
-
-    def __str__(self) -> str:
-        return f'{self.name} {self.version}.{self.ext}'
-
+from catalog import get_app_list
+from resolver import App
+from scheduler import DownloadScheduler, State
+from progress import ProgressAggregator, format_size, format_eta
+
+
+class VirtualList(ttk.Frame):
+    # Scrollable, filterable list of apps grouped by category. Only a
+    # fixed pool of `rows` widgets is created; scrolling and filtering
+    # just rebind them to other apps, so startup time and memory don't
+    # grow with the size of the catalog.
+    def __init__(self, master, apps, rows: int = 12, label=None):
+        super().__init__(master)
+        self.apps = apps
+        self.label = label or (lambda app: app.name)
+        self.items = []
+        self.offset = 0
+
+        # Apps grouped by category, in catalog order
+        self.groups = {}
+        for app in apps:
+            self.groups.setdefault(app.category or 'Other', []).append(app)
+
+        body = ttk.Frame(self)
+        body.pack(side="left", fill="both", expand=True)
+        body.columnconfigure(0, minsize=280)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows = []
+        for i in range(rows):
+            var = tk.BooleanVar()
+            checkbox = ttk.Checkbutton(body, variable=var, style="TCheckbutton", command=lambda i=i: self.toggle(i))
+            header = ttk.Label(body, font=("TkDefaultFont", 9, "bold"))
+            body.rowconfigure(i, minsize=30)
+            self.rows.append((checkbox, header, var))
+
+        self.bind_all("<MouseWheel>", lambda e: self.yview("scroll", int(-1 * (e.delta / 120)), "units"))
+        self.filter('')
+
+    def filter(self, text: str):
+        text = text.strip().lower()
+        self.items = []
+        for category, apps in self.groups.items():
+            matches = apps if not text or text in category.lower() else [app for app in apps if text in app.name.lower()]
+            if matches:
+                self.items.append(category)
+                self.items.extend(matches)
+        self.offset = 0
+        self.refresh()
+
+    def visible_apps(self):
+        return [item for item in self.items if not isinstance(item, str)]
+
+    def refresh(self):
+        for i, (checkbox, header, var) in enumerate(self.rows):
+            index = self.offset + i
+            item = self.items[index] if index < len(self.items) else None
+            if isinstance(item, str):
+                checkbox.grid_remove()
+                header.configure(text=item)
+                header.grid(row=i, column=0, sticky="w", padx=5)
+            elif item:
+                header.grid_remove()
+                var.set(item.checked)
+                checkbox.configure(text=self.label(item))
+                checkbox.grid(row=i, column=0, sticky="w", padx=10)
+            else:
+                checkbox.grid_remove()
+                header.grid_remove()
 
-    # Generate links for different types
-    def hit_request(self, url, stream: bool = None):
-        return requests.get(url, headers=App.user_agent, stream=stream)
+        total = max(len(self.items), 1)
+        self.scrollbar.set(self.offset / total, min(self.offset + len(self.rows), total) / total)
 
-    def __fetch_soup(self):
-        return BeautifulSoup(self.hit_request(self.webURL).content, "html.parser")
+    def toggle(self, i: int):
+        checkbox, header, var = self.rows[i]
+        self.items[self.offset + i].checked = var.get()
 
-    def __get_link_base(self):
-        soup = self.__fetch_soup()
-        element = soup.find(self.element, href=re.compile(f'{self.pattern}.{self.ext}'))
-        if not element:
-            print(f'{self.name} with .{self.ext} extension not found!')
-        else:
-            return self.baseURL + element.get("href")
-        return ''
-
-    # TYPE: 1
-    # If the webURL page has direct link inside the 'a' tag
-    def __get_link(self):
-        self.link = self.__get_link_base()
-        if self.link:
-            match = re.search(f'{self.pattern}.{self.ext}', self.link)
-            self.version = match.group(1) if match else 'Unknown'
-
-    # TYPE: 2
-    # If the webURL page doesn't contain the direct link
-    # However, we know a static link(baseURL) that only differ in version number
-    # for different release. So, we find the version from
-    # the webURL and replace that inside baseURL.
-    def __make_link_with_version(self):
-        soup = self.__fetch_soup()
-        element = soup.find(self.element, string=re.compile(self.pattern))
-        version = re.search(App.version_pattern, element.text).group(1)
-        
-        if not element or not version:
-            print(f'{self.name} with .{self.ext} extension not found!')
-        else:
-            self.link = self.baseURL.replace('VERSION', version)
-            self.version = version
-
-    # TYPE: 3
-    # App release is available on github
-    # so get the link using github rest api
-    def __get_link_from_github(self):
-        release = json.loads(self.hit_request(self.webURL).content)
-        assets = release['assets']
-
-        for asset in assets:
-            if re.search(f'{self.pattern}.{self.ext}', asset['browser_download_url']):
-                self.link = asset['browser_download_url']
-                self.version = release['tag_name']
-                break
-        
-        if not self.link:
-            print(f'{self.name} with .{self.ext} extension not found!')
-
-    # TYPE: 4
-    # Direct unchangeable Link
-    def __direct_link(self):
-        self.link = self.webURL
-        self.version = 'Latest'
-
-    # TYPE: 5
-    # Not direct link. But will redirect to the direct link
-    # so, we are catching that here.
-    def __redirect_link(self):
-        # req = request.Request(self.webURL, headers=App.user_agent)
-        # self.link = request.build_opener().open(req).geturl()
-        req = requests.head(self.webURL, headers=App.user_agent, allow_redirects=False)
-        # print(req.headers)
-        self.link = req.headers['Location']
-        if self.link:
-            # check if version is fixed
-            if self.pattern.startswith('@FIXED '):
-                self.version = self.pattern.replace('@FIXED ', '')
-            else:
-                match = re.search(self.pattern, self.link)
-                if match:
-                    self.version = match.group(1)
+    def yview(self, *args):
+        if args[0] == "moveto":
+            offset = int(float(args[1]) * len(self.items))
+        elif args[2] == "pages":
+            offset = self.offset + int(args[1]) * len(self.rows)
         else:
-            print('Failed to generate link')
-
-    # TYPE: 6
-    # unchangeable direct link is available but version
-    # is on a different page
-    def __direct_link_but_version(self):
-        self.link = self.baseURL
-        soup = self.__fetch_soup()
-        element = soup.find(self.element, string=re.compile(self.pattern))
-        if not element:
-            print(f'version of .{self.name} not found!')
-        else:
-            match = re.search(self.pattern, element.get_text())
-            if match:
-                self.version = match.group(1)
-
-    # TYPE: 7
-    # This is basically a combination of type 1 and 5
-    # Where first we've to find link with type-1 and
-    # then redirect to the direct link with type-5 for downloading
-    def __get_link_then_redirect(self):
-        url = self.__get_link_base()
-        req = requests.get(url, allow_redirects=False)
-        self.link = req.headers['Location']
-        # req = request.Request(url, headers=App.user_agent)
-        # self.link = request.build_opener().open(req).geturl()
+            offset = self.offset + int(args[1])
+        self.offset = max(0, min(offset, len(self.items) - len(self.rows)))
+        self.refresh()
 
 
 class AppDownloaderGUI:
@@ -178,32 +98,36 @@ class AppDownloaderGUI:
         self.version = '1.0.0'
         self.root.title(f"App Downloader v{self.version}")
         self.root.resizable(False, False)
+        from ttkbootstrap import Style  # Only needed once there is a window
         self.style = Style(theme="flatly")
         self.cancel_downloads = False
         self.download_thread = None
         self.downloads_complete = False
+        self.scheduler = None
+        self.max_downloads = tk.IntVar(value=4)
+        self.states = {}
+        self.progress = ProgressAggregator()
+        self.progress_fps = 10
+        self.progress_rows = []
+        if not App.dl_location:
+            App.dl_location = f'{os.getcwd()}/Apps'
         self.apps = get_app_list()
         self.create_widgets()
 
     def create_widgets(self):
         frame = ttk.Frame(self.root)
-        frame.pack(padx=20, pady=20)
-        canvas = tk.Canvas(frame)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollbar.pack(side="right", fill="y")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.bind_all("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1 * (e.delta / 120)), "units"))
-        app_frame = ttk.Frame(canvas)
-        canvas.create_window((0, 0), window=app_frame, anchor="nw")
-        self.app_vars = []
-        for i, app in enumerate(self.apps):
-            var = tk.BooleanVar(value=app.checked)
-            checkbox = ttk.Checkbutton(app_frame, text=app.name, variable=var, style="TCheckbutton")
-            checkbox.pack(anchor="w", padx=10, pady=5)
-            app.var = var
-            self.app_vars.append(var)
+        frame.pack(padx=20, pady=20, fill="x")
+
+        self.search = tk.StringVar()
+        self.search.trace_add("write", lambda *args: self.app_list.filter(self.search.get()))
+        search_entry = ttk.Entry(frame, textvariable=self.search)
+        search_entry.pack(side="top", fill="x", pady=(0, 10))
+
+        self.app_list = VirtualList(frame, self.apps, label=self.app_label)
+        self.app_list.pack(side="top", fill="both", expand=True)
+
+        self.progress_frame = ttk.Frame(self.root)
+        self.progress_frame.pack(padx=20, fill="x")
 
         button_frame = ttk.Frame(self.root)
         button_frame.pack(pady=10)
@@ -211,6 +135,10 @@ class AppDownloaderGUI:
         self.progress_label = ttk.Label(button_frame, text="")
         self.progress_label.pack(side="top", padx=5, pady=5)
 
+        ttk.Label(button_frame, text="Parallel").pack(side="left", padx=(5, 0))
+        self.parallel_spinbox = ttk.Spinbox(button_frame, from_=1, to=16, width=3, textvariable=self.max_downloads)
+        self.parallel_spinbox.pack(side="left", padx=5)
+
         self.select_all_button = ttk.Button(button_frame, text="Select All", command=self.toggle_select_all, takefocus=False)
         self.select_all_button.pack(side="left", padx=5)
 
@@ -222,17 +150,20 @@ class AppDownloaderGUI:
 
         self.root.protocol("WM_DELETE_WINDOW", self.close_app)  # Handle window close event
 
+    # Applies to the apps matching the current search
     def toggle_select_all(self):
-        selected = all(var.get() for var in self.app_vars)
-        for var in self.app_vars:
-            var.set(not selected)
+        apps = self.app_list.visible_apps()
+        selected = all(app.checked for app in apps)
+        for app in apps:
+            app.checked = not selected
+        self.app_list.refresh()
         if selected:
             self.select_all_button.configure(text="Select All")
         else:
             self.select_all_button.configure(text="Deselect All")
 
     def download_selected_apps(self):
-        selected_apps = [app for app, var in zip(self.apps, self.app_vars) if var.get()]
+        selected_apps = [app for app in self.apps if app.checked]
         if not selected_apps:
             messagebox.showwarning("Download", "Please select at least one app.")
             return
@@ -243,16 +174,20 @@ class AppDownloaderGUI:
 
         self.select_all_button.configure(state="disabled")
         self.download_button.configure(state="disabled")
+        self.parallel_spinbox.configure(state="disabled")
 
         self.progress_label.configure(text="Downloading...")
         self.progress_label.update()
+        self.create_progress_rows(self.max_downloads.get())
 
         self.cancel_downloads = False
         self.downloads_complete = False
+        self.scheduler = None
         self.show_cancel_button()
 
-        self.download_thread = threading.Thread(target=self.download_apps, args=(selected_apps,))
+        self.download_thread = threading.Thread(target=self.download_apps, args=(selected_apps, self.max_downloads.get()))
         self.download_thread.start()
+        self.poll_progress()
 
     def create_dir(self):
         if App.dl_location:
@@ -260,56 +195,94 @@ class AppDownloaderGUI:
             if not os.path.exists(path):
                 os.makedirs(path)
 
-    def download_apps(self, apps):
-        for app in apps:
-            if self.cancel_downloads:
-                break
-
-            try:
-                app.generate_link()
-                print(app.link)
-                self.create_dir() # create if path not exist
-                path = os.path.join(App.dl_location, f'{app.name}_{app.version}.{app.ext}')
-                response = app.hit_request(app.link, stream=True)
-                total_size = int(response.headers.get("content-length", 0))
-                if total_size == 0:
-                    total_size = 1
-                block_size = 1024  # 1 Kibibyte
-
-                with open(path, "wb") as file:
-                    downloaded_size = 0
-                    for data in response.iter_content(block_size):
-                        if self.cancel_downloads:
-                            break
-                        if not threading.current_thread().is_alive():  # Check if the download process should be stopped
-                            break
-
-                        file.write(data)
-                        downloaded_size += len(data)
-                        progress = int((downloaded_size / total_size) * 100)
-
-                        self.root.after(10, self.update_progress_label, app, progress)  # Schedule GUI update in the main thread
-
-                    if threading.current_thread().is_alive():  # Check if the download process was not stopped
-                        if self.cancel_downloads:
-                            messagebox.showinfo("Download", f"{app} download canceled.")
-
-            except Exception as e:
-                if threading.current_thread().is_alive():  # Check if the download process was not stopped
-                    messagebox.showerror("Download Error", f"An error occurred while downloading {app.name}: {str(e)}")
+    def download_apps(self, apps, workers):
+        self.create_dir() # create if path not exist
+        self.scheduler = DownloadScheduler(apps, self.download_app, workers=workers, on_change=self.on_state_change)
+        self.scheduler.run()
+
+        for name, e in self.scheduler.errors.items():
+            messagebox.showerror("Download Error", f"An error occurred while downloading {name}: {str(e)}")
 
         self.downloads_complete = True
         messagebox.showinfo("Download", f"Downloaded Selected Apps Successfully.")
         self.reset_ui()
 
-    def update_progress_label(self, app, value):
-        self.progress_label.configure(text=f"Downloading {app}: {value}%")
-        self.progress_label.update_idletasks()
+    # Runs on a scheduler worker thread, returns False if canceled
+    def download_app(self, app):
+        print(app.link)
+        path = app.default_path()
+
+        def progress(n, total_size):
+            self.progress.add(app.name, n, total_size)  # Picked up by poll_progress in the main thread
+
+        def should_cancel():
+            # Check if the download process should be stopped
+            return self.cancel_downloads or not threading.current_thread().is_alive()
+
+        self.progress.start(app.name)
+        try:
+            path = app.fetch(path, progress=progress, should_cancel=should_cancel)
+        finally:
+            self.progress.finish(app.name)
+
+        if threading.current_thread().is_alive():  # Check if the download process was not stopped
+            if self.cancel_downloads:
+                messagebox.showinfo("Download", f"{app} download canceled.")
+        return bool(path)
+
+    def on_state_change(self, app, state):
+        self.root.after(0, self.update_app_state, app, state)  # Schedule GUI update in the main thread
+
+    def update_app_state(self, app, state):
+        self.states[app.name] = state
+        self.app_list.refresh()
+
+    def app_label(self, app):
+        state = self.states.get(app.name, State.QUEUED)
+        return app.name if state == State.QUEUED else f"{app.name} - {state.value}"
+
+    # One progress bar for each download worker
+    def create_progress_rows(self, count):
+        for label, bar in self.progress_rows:
+            label.master.destroy()
+        self.progress_rows = []
+        for _ in range(count):
+            row = ttk.Frame(self.progress_frame)
+            label = ttk.Label(row, width=45)
+            label.pack(side="left")
+            bar = ttk.Progressbar(row, length=160, maximum=1.0)
+            bar.pack(side="right", padx=5)
+            self.progress_rows.append((label, bar))
+
+    # Runs in the main thread at progress_fps while downloading
+    def poll_progress(self):
+        if not (self.download_thread and self.download_thread.is_alive()):
+            self.create_progress_rows(0)
+            return
+
+        transfers = self.progress.poll()
+        for i, (label, bar) in enumerate(self.progress_rows):
+            if i < len(transfers):
+                item = transfers[i]
+                size = f"{format_size(item.done)} / {format_size(item.total)}" if item.total else format_size(item.done)
+                label.configure(text=f"{item.name}  {size}  {format_size(item.rate)}/s  {format_eta(item.eta)}")
+                bar.configure(value=item.fraction)
+                label.master.pack(side="top", fill="x", pady=2)
+            else:
+                label.master.pack_forget()
+
+        if self.scheduler:
+            done = sum(state in (State.DONE, State.FAILED, State.CANCELED) for state in self.scheduler.states.values())
+            rate = sum(item.rate for item in transfers)
+            self.progress_label.configure(text=f"Downloading: {done}/{len(self.scheduler.states)} done, {format_size(rate)}/s")
+
+        self.root.after(int(1000 / self.progress_fps), self.poll_progress)
 
 
     def reset_ui(self):
         self.select_all_button.configure(state="normal")
         self.download_button.configure(state="normal")
+        self.parallel_spinbox.configure(state="normal")
         self.hide_cancel_button()
 
         # Show or hide the cancel button based on download status
@@ -330,6 +303,8 @@ class AppDownloaderGUI:
         if self.download_thread and self.download_thread.is_alive():
             if messagebox.askyesno("Cancel Downloads", "Are you sure you want to cancel the downloads?"):
                 self.cancel_downloads = True  # Set the flag to cancel downloads
+                if self.scheduler:
+                    self.scheduler.cancel()
                 self.download_thread.join(Timeout=1) # Do not fix the typo, it is intentional
 
     def close_app(self):
@@ -341,161 +316,11 @@ class AppDownloaderGUI:
         self.reset_ui()
 
 
+def main():
+    root = tk.Tk()
+    AppDownloaderGUI(root)
+    root.mainloop()
 
 
-
-def get_app_list():
-    return [
-            App(
-                '7zip',
-                'msi',
-                'https://www.7-zip.org/download.html',
-                r'.*?(\d{1,})-x64',
-                Type.DIRECT.value,
-                'https://www.7-zip.org/'
-            ),
-            App(
-                'WinRAR',
-                'exe',
-                'https://www.rarlab.com/download.htm',
-                r'.*?winrar.*?64-(.*?)',
-                Type.DIRECT.value,
-                'https://www.rarlab.com/'
-            ),
-            App(
-                'ImageGlass',
-                'msi', 
-                'https://api.github.com/repos/d2phap/ImageGlass/releases/latest', 
-                r'ImageGlass_Kobe.*?64',
-                Type.GITHUB.value
-            ),
-            App(
-                'OBS Studio',
-                'exe', 
-                'https://api.github.com/repos/obsproject/obs-studio/releases/latest', 
-                r'OBS-Studio-(.*?)-Full-Installer-x64',
-                Type.GITHUB.value
-            ),
-            App(
-                'SumatraPDF',
-                'exe',
-                'https://www.sumatrapdfreader.org/download-free-pdf-viewer',
-                r'.*?SumatraPDF-(.*?)-64-install',
-                Type.DIRECT.value,
-                'https://www.sumatrapdfreader.org/'
-            ),
-            App(
-                'AIMP Audio Player',
-                'exe',
-                'https://www.aimp.ru/?do=download&os=windows',
-                r'AIMP v.*?',
-                Type.STATIC.value,
-                'https://aimp.ru/files/windows/builds/aimp_VERSION_w64.exe',
-                'h1'
-            ),
-            App(
-                'Chrome',
-                'msi',
-                'https://dl.google.com/dl/chrome/install/googlechromestandaloneenterprise64.msi',
-                'Latest',
-                Type.UNCHANGED.value
-            ),
-            App(
-                'FireFox',
-                'exe',
-                'https://download.mozilla.org/?product=firefox-latest&os=win64&lang=en-US',
-                r'/([\d.]+[a-z]*\d*)/',
-                Type.REDIRECT.value
-            ),
-            App(
-                'Github Desktop',
-                'exe',
-                'https://central.github.com/deployments/desktop/desktop/latest/win32?format=exe',
-                r'/([\d.a-z-]+)/(GitHubDesktopSetup-x64)',
-                Type.REDIRECT.value
-            ),
-            App(
-                'VSCode',
-                'exe',
-                'https://code.visualstudio.com/sha/download?build=stable&os=win32-x64',
-                r'-([\d\.]+)',
-                Type.REDIRECT.value
-            ),
-            App(
-                'Discord',
-                'exe',
-                'https://discord.com/api/downloads/distributions/app/installers/latest?channel=stable&platform=win&arch=x86',
-                r'/(\d+(\.\d+)+)/',
-                Type.REDIRECT.value
-            ),
-            App(
-                'Notepad++',
-                'exe',
-                'https://api.github.com/repos/notepad-plus-plus/notepad-plus-plus/releases/latest',
-                r'npp\.(\d+\.)+\d+\.Installer\.x64',
-                Type.GITHUB.value
-            ),
-            App(
-                'SublimeText',
-                'exe',
-                'https://www.sublimetext.com/download',
-                r'Build .*?',
-                Type.STATIC.value,
-                'https://download.sublimetext.com/sublime_text_build_VERSION_x64_setup.exe',
-                'h3'
-            ),
-            App(
-                'QBitTorrent',
-                'exe',
-                'https://www.qbittorrent.org/download',
-                r'Latest: .*?',
-                Type.STATIC.value,
-                'https://altushost-swe.dl.sourceforge.net/project/qbittorrent/qbittorrent-win32/qbittorrent-VERSION/qbittorrent_VERSION_x64_setup.exe',
-            ),
-            App(
-                'VLC Player',
-                'msi',
-                'https://www.videolan.org/vlc/download-windows.html',
-                r'//get.videolan.org/vlc/(\d+\.\d+\.\d+)/win64/vlc-(\d+\.\d+\.\d+)-win64',
-                Type.DIRECT_THEN_REDIRECT.value,
-                'https:'
-            ),
-            App(
-                'Brave Browser',
-                'exe',
-                'https://api.github.com/repos/brave/brave-browser/releases/latest',
-                r'BraveBrowserStandaloneSetup',
-                Type.GITHUB.value
-            ),
-            App(
-                'Anydesk',
-                'exe',
-                'https://anydesk.com/en/downloads/windows',
-                r'v([\d.]+)',
-                Type.UNCHANGED_BUT_VERSION.value,
-                'https://download.anydesk.com/AnyDesk.exe',
-                'div'
-            ),
-            App(
-                'Telegram',
-                'exe', 
-                'https://api.github.com/repos/telegramdesktop/tdesktop/releases/latest', 
-                r'/tsetup-x64\.(.*?)',
-                Type.GITHUB.value
-            ),
-            App(
-                'Zoom',
-                'exe',
-                'https://zoom.us/client/latest/ZoomInstaller.exe',
-                r'/([\d.]+[a-z]*\d*)/',
-                Type.REDIRECT.value
-            ),
-    ]
-
-
-
-root = tk.Tk()
-app = AppDownloaderGUI(root)
-root.mainloop()
-
-
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import transport
+
+# On-disk cache of scraped pages and GitHub release JSON. Each url
+# keeps its body with the ETag/Last-Modified it was served with, and
+# is revalidated with If-None-Match/If-Modified-Since so an unchanged
+# page costs a 304 (which doesn't count against the GitHub rate limit).
+cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'http')
+default_max_size = 64 * 1024 * 1024 # 64 Mebibytes
+
+
+class HTTPCache:
+    def __init__(self, path: str = None, max_size: int = None):
+        self.path = path or cache_dir
+        self.max_size = max_size if max_size is not None else default_max_size
+        self.index_path = os.path.join(self.path, 'index.json')
+        self.lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(self.index_path) as file:
+                self.index = json.load(file)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def get(self, url: str, headers: dict = None) -> bytes:
+        return self.fetch(url, headers)[0]
+
+    # Body of url and the response it came with, which is a 304 when
+    # the body was served from the cache
+    def fetch(self, url: str, headers: dict = None):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        body_path = os.path.join(self.path, key)
+        with self.lock:
+            entry = self.index.get(key)
+
+        headers = dict(headers or {})
+        cached = entry and os.path.exists(body_path)
+        if cached:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = transport.get(url, headers=headers, hedge=True)
+        if response.status_code == 304 and cached:
+            with open(body_path, 'rb') as file:
+                content = file.read()
+            with self.lock:
+                entry['used'] = time.time()
+                self.__save_index()
+            return content, response
+
+        etag = response.headers.get('etag', '')
+        last_modified = response.headers.get('last-modified', '')
+        if response.ok and (etag or last_modified):
+            self.__store(key, body_path, url, response.content, etag, last_modified)
+        return response.content, response
+
+    def __store(self, key, body_path, url, content, etag, last_modified):
+        tmp = f'{body_path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as file:
+            file.write(content)
+        os.replace(tmp, body_path)
+        with self.lock:
+            self.index[key] = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': len(content),
+                'used': time.time(),
+            }
+            self.__evict()
+            self.__save_index()
+
+    # Drop least recently used entries until the cache fits max_size
+    def __evict(self):
+        total = sum(entry['size'] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]['used']):
+            if total <= self.max_size:
+                break
+            total -= entry['size']
+            del self.index[key]
+            try:
+                os.remove(os.path.join(self.path, key))
+            except OSError:
+                pass
+
+    def __save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(self.index, file)
+        os.replace(tmp, self.index_path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Use another directory for the default cache, cache_dir and
+# default_max_size unless given
+def configure(path: str = None, max_size: int = None):
+    global _cache
+    with _cache_lock:
+        _cache = HTTPCache(path, max_size)
+
+
+def default_cache() -> HTTPCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache()
+    return _cache
+
+
+# Fetch url through the default cache
+def get(url: str, headers: dict = None) -> bytes:
+    return default_cache().get(url, headers)
+
+
+def fetch(url: str, headers: dict = None):
+    return default_cache().fetch(url, headers)
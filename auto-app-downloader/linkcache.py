@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import threading
+
+# Links of apps whose resolution is only a chain of redirects (REDIRECT
+# and DIRECT_THEN_REDIRECT), remembered across runs. A link is reused
+# for the app's `link_ttl` seconds (default_ttl when the catalog doesn't
+# set one, 0 to never cache it) and forgotten as soon as a download
+# from it fails. The least recently used entries are dropped beyond
+# max_entries, and a cache of 0 entries keeps nothing.
+cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'links.json')
+default_ttl = 3600
+default_max_entries = 256
+# Off to resolve everything again, e.g. with --refresh
+enabled = True
+
+
+def key_of(app) -> str:
+    # The url is part of the key, so a catalog change isn't served stale
+    return f'{app.name} {app.webURL}'
+
+
+def ttl_of(app) -> float:
+    return default_ttl if app.link_ttl is None else app.link_ttl
+
+
+class LinkCache:
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or cache_path
+        self.max_entries = max_entries if max_entries is not None else default_max_entries
+        self.lock = threading.Lock()
+        try:
+            with open(self.path) as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    # (link, version) of app if it was resolved less than its TTL ago
+    def get(self, app):
+        ttl = ttl_of(app)
+        if not ttl or self.max_entries <= 0:
+            return None
+        with self.lock:
+            entry = self.entries.get(key_of(app))
+            if not entry or time.time() - entry['resolved_at'] > ttl:
+                return None
+            entry['used'] = time.time()
+        return entry['link'], entry['version']
+
+    def put(self, app):
+        if not ttl_of(app) or not app.link or self.max_entries <= 0:
+            return
+        now = time.time()
+        with self.lock:
+            self.entries[key_of(app)] = {'link': app.link, 'version': app.version, 'resolved_at': now, 'used': now}
+            excess = len(self.entries) - self.max_entries
+            if excess > 0:
+                for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['used'])[:excess]:
+                    del self.entries[key]
+            self.__save()
+
+    def invalidate(self, app):
+        with self.lock:
+            if self.entries.pop(key_of(app), None):
+                self.__save()
+
+    def __save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(self.entries, file)
+        os.replace(tmp, self.path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Use another file for the default cache, cache_path and
+# default_max_entries unless given
+def configure(path: str = None, max_entries: int = None):
+    global _cache
+    with _cache_lock:
+        _cache = LinkCache(path, max_entries)
+
+
+def default_cache() -> LinkCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LinkCache()
+    return _cache
+
+
+def get(app):
+    return default_cache().get(app) if enabled else None
+
+
+def put(app):
+    default_cache().put(app)
+
+
+def invalidate(app):
+    default_cache().invalidate(app)
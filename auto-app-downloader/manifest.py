@@ -0,0 +1,143 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Persistent record of every successful download in a download
+# location. It answers "is this version already here?" without
+# rescanning the directory and keeps the version history of each app.
+filename = 'manifest.db'
+# Versions that don't identify a release, these are never skipped
+unversioned = ('', 'Latest', 'Unknown')
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for data in iter(lambda: file.read(1024 * 1024), b''):
+            sha256.update(data)
+    return sha256.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.db:
+            self.db.execute('''
+                CREATE TABLE IF NOT EXISTS downloads (
+                    id INTEGER PRIMARY KEY,
+                    app TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    verified INTEGER NOT NULL DEFAULT 0,
+                    mtime REAL NOT NULL DEFAULT 0,
+                    downloaded_at REAL NOT NULL
+                )
+            ''')
+            # Manifests written before checksums were verified
+            columns = [row['name'] for row in self.db.execute('PRAGMA table_info(downloads)')]
+            if 'verified' not in columns:
+                self.db.execute('ALTER TABLE downloads ADD COLUMN verified INTEGER NOT NULL DEFAULT 0')
+            # and before their modification time was kept
+            if 'mtime' not in columns:
+                self.db.execute('ALTER TABLE downloads ADD COLUMN mtime REAL NOT NULL DEFAULT 0')
+            self.db.execute('CREATE INDEX IF NOT EXISTS downloads_app ON downloads (app, version)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS downloads_time ON downloads (downloaded_at)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS downloads_sha256 ON downloads (sha256)')
+
+    # `verified` tells whether sha256 matched a digest published by the vendor
+    def record(self, app: str, version: str, link: str, path: str, sha256: str = None, verified: bool = False):
+        stat = os.stat(path)
+        sha256 = sha256 or file_sha256(path)
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT INTO downloads (app, version, link, path, size, sha256, verified, mtime, downloaded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (app, version, link, os.path.abspath(path), stat.st_size, sha256, int(verified), stat.st_mtime, time.time()),
+            )
+
+    def latest(self, app: str, version: str = None):
+        query = 'SELECT * FROM downloads WHERE app = ?'
+        params = [app]
+        if version is not None:
+            query += ' AND version = ?'
+            params.append(version)
+        with self.lock:
+            return self.db.execute(query + ' ORDER BY downloaded_at DESC LIMIT 1', params).fetchone()
+
+    # Latest download of app with these exact bytes
+    def find(self, app: str, sha256: str):
+        with self.lock:
+            return self.db.execute('SELECT * FROM downloads WHERE app = ? AND sha256 = ? ORDER BY downloaded_at DESC LIMIT 1', (app, sha256)).fetchone()
+
+    # Make a download the latest one of its app again
+    def touch(self, row_id: int):
+        with self.lock, self.db:
+            self.db.execute('UPDATE downloads SET downloaded_at = ? WHERE id = ?', (time.time(), row_id))
+
+    # True if this version was downloaded and the file is still there
+    # with the recorded size and hash. The file is only hashed again
+    # when its modification time changed since it was recorded, or
+    # always when verify is set.
+    def is_present(self, app: str, version: str, verify: bool = False) -> bool:
+        if version in unversioned:
+            return False
+        row = self.latest(app, version)
+        if not row or not os.path.isfile(row['path']):
+            return False
+        stat = os.stat(row['path'])
+        if stat.st_size != row['size']:
+            return False
+        if not verify and stat.st_mtime == row['mtime']:
+            return True
+        if file_sha256(row['path']) != row['sha256']:
+            return False
+        with self.lock, self.db:
+            self.db.execute('UPDATE downloads SET mtime = ? WHERE id = ?', (stat.st_mtime, row['id']))
+        return True
+
+    # Latest download of every app
+    def latest_all(self):
+        with self.lock:
+            return self.db.execute('''
+                SELECT * FROM downloads AS d
+                WHERE downloaded_at = (SELECT MAX(downloaded_at) FROM downloads WHERE app = d.app)
+                ORDER BY app
+            ''').fetchall()
+
+    def history(self, app: str):
+        with self.lock:
+            return self.db.execute('SELECT * FROM downloads WHERE app = ? ORDER BY downloaded_at', (app,)).fetchall()
+
+    def with_sha256(self, sha256: str):
+        with self.lock:
+            return self.db.execute('SELECT * FROM downloads WHERE sha256 = ?', (sha256,)).fetchall()
+
+    # Downloads recorded since the given unix time, oldest first
+    def changed_since(self, since: float):
+        with self.lock:
+            return self.db.execute('SELECT * FROM downloads WHERE downloaded_at >= ? ORDER BY downloaded_at', (since,)).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+# Shared manifest of a download location
+def open_manifest(dl_location: str) -> Manifest:
+    dl_location = os.path.abspath(dl_location or '.')
+    with _manifests_lock:
+        if dl_location not in _manifests:
+            os.makedirs(dl_location, exist_ok=True)
+            _manifests[dl_location] = Manifest(os.path.join(dl_location, filename))
+        return _manifests[dl_location]
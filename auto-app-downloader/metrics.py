@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Phase timings of every resolve and download. measure() opens a record
+# for an app on the current thread; transport, the resolver and the
+# downloads add to whatever record is open on their thread:
+#
+#   connect    DNS lookup and TCP connect of new connections
+#   tls        TLS handshake of new connections
+#   ttfb       time from sending requests to their response headers
+#              (includes connect/tls when a new connection was needed)
+#   parse      time spent extracting links from pages
+#   bytes      bytes written by downloads
+#   requests   requests sent, redirects followed
+#
+# With `path` set, finished records are appended to it as JSON lines
+# and write_prometheus() keeps the latest record of every app/phase in
+# a Prometheus text file next to it (same name, .prom extension).
+path = ''
+
+counters = ('connect', 'tls', 'ttfb', 'parse', 'bytes', 'requests', 'redirects')
+
+_local = threading.local()
+_lock = threading.Lock()
+_latest = {}
+
+
+class Record:
+    def __init__(self, app: str, phase: str):
+        self.app = app
+        self.phase = phase
+        self.started = time.time()
+        self.duration = 0.0
+        self.error = ''
+        self.values = dict.fromkeys(counters, 0)
+
+    @property
+    def throughput(self) -> float:
+        return self.values['bytes'] / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            app=self.app,
+            phase=self.phase,
+            started=self.started,
+            duration=round(self.duration, 6),
+            **{name: round(value, 6) for name, value in self.values.items()},
+            throughput=round(self.throughput, 1),
+            error=self.error,
+        )
+
+
+def current():
+    return getattr(_local, 'record', None)
+
+
+def add(name: str, value):
+    record = current()
+    if record:
+        with _lock:
+            record.values[name] += value
+
+
+# Run fn on another thread with the caller's record, so work handed to
+# a pool is still counted for the app that asked for it
+def bind(fn):
+    record = current()
+
+    def run(*args, **kwargs):
+        previous = current()
+        _local.record = record
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.record = previous
+    return run
+
+
+@contextmanager
+def measure(app: str, phase: str):
+    record = Record(app, phase)
+    previous = current()
+    _local.record = record
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.error = str(e) or type(e).__name__
+        raise
+    finally:
+        record.duration = time.perf_counter() - started
+        _local.record = previous
+        finish(record)
+
+
+def finish(record: Record):
+    with _lock:
+        _latest[(record.app, record.phase)] = record
+        if path:
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record.to_dict()) + '\n')
+
+
+def prometheus_path() -> str:
+    return os.path.splitext(path)[0] + '.prom'
+
+
+# name: (help, value of a record)
+gauges = {
+    'duration_seconds': ('Wall time of the phase', lambda r: r.duration),
+    'connect_seconds': ('DNS and TCP connect time', lambda r: r.values['connect']),
+    'tls_seconds': ('TLS handshake time', lambda r: r.values['tls']),
+    'ttfb_seconds': ('Time to the first byte of responses', lambda r: r.values['ttfb']),
+    'parse_seconds': ('Time spent parsing pages', lambda r: r.values['parse']),
+    'bytes': ('Bytes downloaded', lambda r: r.values['bytes']),
+    'throughput_bytes_per_second': ('Download throughput', lambda r: r.throughput),
+    'requests': ('Requests sent', lambda r: r.values['requests']),
+    'redirects': ('Redirects followed', lambda r: r.values['redirects']),
+    'success': ('1 if the phase finished without an error', lambda r: 0 if r.error else 1),
+    'last_run_timestamp_seconds': ('When the phase last ran', lambda r: r.started),
+}
+
+
+def write_prometheus():
+    if not path:
+        return
+    with _lock:
+        records = sorted(_latest.values(), key=lambda r: (r.app, r.phase))
+    lines = []
+    for name, (description, value) in gauges.items():
+        lines.append(f'# HELP app_downloader_{name} {description}')
+        lines.append(f'# TYPE app_downloader_{name} gauge')
+        for record in records:
+            app = record.app.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'app_downloader_{name}{{app="{app}",phase="{record.phase}"}} {value(record):g}')
+
+    target = prometheus_path()
+    temp = target + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    os.replace(temp, target)
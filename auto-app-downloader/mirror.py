@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import transport
+from manifest import open_manifest
+from store import Store
+
+# LAN mirror of a download location. `serve()` publishes the installer
+# store over HTTP:
+#
+#   GET /index.json       latest version of every app that is on disk
+#   GET /blobs/<sha256>   the installer, with ETag and Range support
+#
+# Other instances pointed at it with App.mirror resolve apps from the
+# index first and only go to the vendor for apps the mirror lacks, so
+# a site does one WAN fetch per release and the rest are LAN fetches.
+
+range_pattern = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def build_index(dl_location: str) -> dict:
+    installers = Store(dl_location)
+    index = {}
+    for row in open_manifest(dl_location).latest_all():
+        if not installers.has(row['sha256']):
+            continue
+        index[row['app']] = {
+            'version': row['version'],
+            'sha256': row['sha256'],
+            'size': row['size'],
+            'file': os.path.basename(row['path']),
+            'url': f'/blobs/{row["sha256"]}',
+        }
+    return index
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    dl_location = ''
+
+    def do_HEAD(self):
+        self.handle_get(body=False)
+
+    def do_GET(self):
+        self.handle_get(body=True)
+
+    def handle_get(self, body: bool):
+        path = self.path.split('?')[0]
+        if path == '/index.json':
+            data = json.dumps(build_index(self.dl_location)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            if body:
+                self.wfile.write(data)
+        elif path.startswith('/blobs/'):
+            self.send_blob(path[len('/blobs/'):], body)
+        else:
+            self.send_error(404)
+
+    def send_blob(self, sha256: str, body: bool):
+        if not re.fullmatch(r'[0-9a-f]{64}', sha256):
+            self.send_error(404)
+            return
+        blob = Store(self.dl_location).blob_path(sha256)
+        if not os.path.isfile(blob):
+            self.send_error(404)
+            return
+
+        # Blobs are immutable, so the hash is a strong validator
+        etag = f'"{sha256}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        size = os.path.getsize(blob)
+        start, end = 0, size - 1
+        match = range_pattern.match(self.headers.get('Range', ''))
+        partial = bool(match) and self.headers.get('If-Range', etag) == etag
+        if partial:
+            first, last = match.groups()
+            if first:
+                start, end = int(first), min(int(last), size - 1) if last else size - 1
+            elif last:
+                start = max(size - int(last), 0)
+            if start > end or start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        self.send_response(206 if partial else 200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end - start + 1))
+        if partial:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if not body:
+            return
+
+        with open(blob, 'rb') as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = file.read(min(remaining, 1024 * 1024))
+                if not data:
+                    break
+                self.wfile.write(data)
+                remaining -= len(data)
+
+
+def create_server(dl_location: str, host: str = '0.0.0.0', port: int = 8080) -> ThreadingHTTPServer:
+    handler = type('Handler', (MirrorHandler,), {'dl_location': os.path.abspath(dl_location)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(dl_location: str, host: str = '0.0.0.0', port: int = 8080):
+    server = create_server(dl_location, host, port)
+    print(f'Serving {os.path.abspath(dl_location)} on http://{host}:{server.server_address[1]}/index.json')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+# Entry of an app in a mirror's index, fetched once per process. Any
+# failure to reach the mirror just means the vendor is used.
+def lookup(mirror: str, name: str):
+    mirror = mirror.rstrip('/')
+    with _lock:
+        if mirror not in _indexes:
+            try:
+                response = transport.get(f'{mirror}/index.json')
+                response.raise_for_status()
+                _indexes[mirror] = response.json()
+            except Exception as e:
+                print(f'Mirror {mirror} is not available: {e}')
+                _indexes[mirror] = {}
+        entry = _indexes[mirror].get(name)
+    if entry:
+        return dict(entry, url=mirror + entry['url'])
+    return None
@@ -0,0 +1,83 @@
+import time
+import threading
+
+# Download workers only add byte counts here (a lock and an addition
+# per chunk); the UI polls a snapshot at a fixed rate, so the cost on
+# the UI side doesn't depend on how many chunks were written.
+
+
+class Transfer:
+    def __init__(self, name: str):
+        self.name = name
+        self.done = 0
+        self.total = 0
+        self.started = time.monotonic()
+        # Updated by poll()
+        self.rate = 0.0
+        self.last_done = 0
+        self.last_time = self.started
+
+    @property
+    def fraction(self) -> float:
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    # Seconds left at the current rate, None if unknown
+    @property
+    def eta(self):
+        if not self.total or not self.rate:
+            return None
+        return max(self.total - self.done, 0) / self.rate
+
+
+class ProgressAggregator:
+    # Weight of the latest sample in the smoothed rate
+    smoothing = 0.3
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.transfers = {}
+
+    def start(self, name: str):
+        with self.lock:
+            self.transfers[name] = Transfer(name)
+
+    def add(self, name: str, n: int, total: int = 0):
+        with self.lock:
+            transfer = self.transfers.get(name)
+            if transfer:
+                transfer.done += n
+                if total:
+                    transfer.total = total
+
+    def finish(self, name: str):
+        with self.lock:
+            self.transfers.pop(name, None)
+
+    # Active transfers with their rate updated, meant to be called at
+    # a fixed frame rate by a single consumer
+    def poll(self):
+        now = time.monotonic()
+        with self.lock:
+            transfers = list(self.transfers.values())
+            for transfer in transfers:
+                elapsed = now - transfer.last_time
+                if elapsed > 0:
+                    rate = (transfer.done - transfer.last_done) / elapsed
+                    transfer.rate = rate if not transfer.rate else transfer.rate + self.smoothing * (rate - transfer.rate)
+                transfer.last_done = transfer.done
+                transfer.last_time = now
+        return transfers
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds), 60)
+    return f'{minutes:02d}:{seconds:02d}'
@@ -0,0 +1,340 @@
+import os
+import re
+import time
+import threading
+from enum import Enum
+import transport
+import transfer
+import httpcache
+import checksum
+import github
+import extract
+import metrics
+import linkcache
+from manifest import open_manifest, unversioned
+from store import Store
+import store
+
+
+class Type(Enum):
+    DIRECT = 1
+    STATIC = 2
+    GITHUB = 3
+    UNCHANGED = 4
+    REDIRECT = 5
+    UNCHANGED_BUT_VERSION = 6
+    DIRECT_THEN_REDIRECT = 7
+
+
+# Types resolved only by following redirects, whose links are kept in
+# the link cache between runs
+cached_types = (Type.REDIRECT.value, Type.DIRECT_THEN_REDIRECT.value)
+
+
+class App:
+    dl_location: str = ''
+    # Base url of a LAN mirror (see mirror.py) to resolve from first
+    mirror: str = ''
+    version_pattern = re.compile(r'([\d\.]+)')
+
+    def __init__(self, name: str, ext: str, webURL: str, pattern: str, type: int, baseURL: str = '', element: str = 'a', checked=False, category: str = '', interval: float = 0, priority: int = 0, link_ttl: float = None):
+        self.name = name
+        self.version = ''
+        self.ext = ext
+        self.webURL = webURL
+        self.pattern = pattern
+        self.type = type
+        self.element = element
+        self.link: str = ''
+        self.sha256: str = ''
+        # Compiled once here instead of on every lookup
+        self.link_pattern = re.compile(f'{pattern}.{ext}')
+        self.text_pattern = re.compile(pattern)
+        self.baseURL = baseURL
+        self.element = element
+        self.checked = checked
+        self.category = category
+        # Hours between checks in watch mode, 0 for the default
+        self.interval = interval
+        # Download order under the priority policy, higher first
+        self.priority = priority
+        # HEAD of the link and the bytes it reported, when probed for
+        # the download order (see probe())
+        self.link_info = None
+        self.size = 0
+        # Seconds a resolved link is reused (see linkcache.py)
+        self.link_ttl = link_ttl
+
+    def generate_link(self):
+        # A probe of the previous link says nothing about the new one
+        self.link_info = None
+        with metrics.measure(self.name, 'resolve') as record:
+            self.__generate_link()
+            if not self.link:
+                record.error = 'no link'
+
+    def __generate_link(self):
+        if App.mirror and self.__link_from_mirror():
+            return
+        if self.type in cached_types:
+            cached = linkcache.get(self)
+            if cached:
+                self.link, self.version = cached
+                return
+        self.__resolve_link()
+        if self.type in cached_types and self.link:
+            linkcache.put(self)
+
+    def __resolve_link(self):
+        if self.type == 1:
+            self.__get_link()
+        elif self.type == 2:
+            self.__make_link_with_version()
+        elif self.type == 3:
+            self.__get_link_from_github()
+        elif self.type == 4:
+            self.__direct_link()
+        elif self.type == 5:
+            self.__redirect_link()
+        elif self.type == 6:
+            self.__direct_link_but_version()
+        elif self.type == 7:
+            self.__get_link_then_redirect()
+        else:
+            print('Type doesn\'t exist!')
+
+
+    # The mirror already has this app, so skip the vendor entirely
+    def __link_from_mirror(self):
+        import mirror
+        entry = mirror.lookup(App.mirror, self.name)
+        if not entry:
+            return False
+        self.link = entry['url']
+        self.version = entry['version']
+        self.sha256 = entry['sha256']
+        return True
+
+    # Generate links for different types
+    def hit_request(self, url, stream: bool = None):
+        return transport.get(url, stream=stream)
+
+    def __find_element(self, href=None, string=None):
+        html = httpcache.get(self.webURL)
+        started = time.perf_counter()
+        element = extract.find(html, self.element, href=href, string=string)
+        metrics.add('parse', time.perf_counter() - started)
+        return element
+
+    def __get_link_base(self):
+        element = self.__find_element(href=self.link_pattern)
+        if not element:
+            print(f'{self.name} with .{self.ext} extension not found!')
+        else:
+            return self.baseURL + element.get("href")
+        return ''
+
+    def __version_from_link(self, url):
+        match = self.link_pattern.search(url)
+        return match.group(1) if match else 'Unknown'
+
+    # TYPE: 1
+    # If the webURL page has direct link inside the 'a' tag
+    def __get_link(self):
+        self.link = self.__get_link_base()
+        if self.link:
+            self.version = self.__version_from_link(self.link)
+
+    # TYPE: 2
+    # If the webURL page doesn't contain the direct link
+    # However, we know a static link(baseURL) that only differ in version number
+    # for different release. So, we find the version from
+    # the webURL and replace that inside baseURL.
+    def __make_link_with_version(self):
+        element = self.__find_element(string=self.text_pattern)
+        match = App.version_pattern.search(element.text) if element else None
+        version = match.group(1) if match else ''
+
+        if not element or not version:
+            print(f'{self.name} with .{self.ext} extension not found!')
+        else:
+            self.link = self.baseURL.replace('VERSION', version)
+            self.version = version
+
+    # TYPE: 3
+    # App release is available on github
+    # so get the link using github api (see github.py)
+    def __get_link_from_github(self):
+        release = github.release(self.webURL)
+        assets = release['assets']
+
+        for asset in assets:
+            if self.link_pattern.search(asset['browser_download_url']):
+                self.link = asset['browser_download_url']
+                self.version = release['tag_name']
+                self.sha256 = checksum.github_sha256(release, asset)
+                break
+        
+        if not self.link:
+            print(f'{self.name} with .{self.ext} extension not found!')
+
+    # TYPE: 4
+    # Direct unchangeable Link
+    def __direct_link(self):
+        self.link = self.webURL
+        self.version = 'Latest'
+
+    # TYPE: 5
+    # Not direct link. But will redirect to the direct link
+    # so, we are catching that here. The redirects are followed with
+    # HEAD, which skips the body; vendors that refuse HEAD (405 or any
+    # other 4xx) are asked again with a streamed GET.
+    def __redirect_link(self):
+        with transport.head(self.webURL, allow_redirects=True, hedge=True) as response:
+            self.link = response.url
+            refused = 400 <= response.status_code < 500
+        if refused:
+            with transport.get(self.webURL, stream=True, hedge=True) as response:
+                self.link = response.url
+        if self.link:
+            # check if version is fixed
+            if self.pattern.startswith('@FIXED '):
+                self.version = self.pattern.replace('@FIXED ', '')
+            else:
+                match = self.text_pattern.search(self.link)
+                if match:
+                    self.version = match.group(1)
+        else:
+            print('Failed to generate link')
+
+    # TYPE: 6
+    # unchangeable direct link is available but version
+    # is on a different page
+    def __direct_link_but_version(self):
+        self.link = self.baseURL
+        element = self.__find_element(string=self.text_pattern)
+        if not element:
+            print(f'version of .{self.name} not found!')
+        else:
+            match = self.text_pattern.search(element.get_text())
+            if match:
+                self.version = match.group(1)
+
+    # TYPE: 7
+    # This is basically a combination of type 1 and 5
+    # Where first we've to find link with type-1 and
+    # then redirect to the direct link with type-5 for downloading
+    def __get_link_then_redirect(self):
+        url = self.__get_link_base()
+        if not url:
+            return
+        # Streamed, so a server answering with the file itself only costs
+        # the headers
+        with transport.get(url, allow_redirects=False, stream=True, hedge=True) as response:
+            self.link = response.headers.get('Location', '')
+        self.version = self.__version_from_link(url)
+
+    def default_path(self) -> str:
+        return os.path.join(App.dl_location, f'{self.name}_{self.version}.{self.ext}')
+
+    def is_present(self) -> bool:
+        return open_manifest(App.dl_location).is_present(self.name, self.version)
+
+    # HEAD the link for its size. The result is handed to the download
+    # so it isn't asked twice; versions already downloaded are skipped
+    # by fetch() and not probed at all.
+    def probe(self):
+        if self.link and not self.is_present():
+            self.link_info = transfer.probe(self.link)
+            self.size = self.link_info.size
+
+    # Download into path through the manifest and the installer store.
+    # Versions already present are skipped. Downloads whose version
+    # doesn't identify a release get a short hash in their name so they
+    # don't replace each other. Returns the path of the file, or None if
+    # the download was canceled.
+    def fetch(self, path: str, progress=None, should_cancel=None):
+        location = os.path.dirname(path) or '.'
+        manifest = open_manifest(location)
+        if manifest.is_present(self.name, self.version):
+            print(f'{self} is already downloaded, skipping')
+            return manifest.latest(self.name, self.version)['path']
+
+        def counted(n, total):
+            metrics.add('bytes', n)
+            if progress:
+                progress(n, total)
+
+        # A probe is used once, a retry asks the server again
+        info, self.link_info = self.link_info, None
+        with metrics.measure(self.name, 'download'):
+            try:
+                sha256 = transfer.download(self.link, path, progress=counted, should_cancel=should_cancel, expected_sha256=self.sha256, info=info)
+            except Exception:
+                # The link may be stale, resolve it again next time
+                linkcache.invalidate(self)
+                raise
+        if not sha256:
+            return None
+
+        if self.version in unversioned:
+            # The same bytes as an earlier download are not a new one; it
+            # only becomes the latest again if something else came since
+            previous = manifest.find(self.name, sha256)
+            if previous and os.path.isfile(previous['path']):
+                os.remove(path)
+                if previous['id'] != manifest.latest(self.name)['id']:
+                    manifest.touch(previous['id'])
+                print(f'{self} has not changed')
+                return previous['path']
+            named = os.path.join(location, f'{self.name}_{self.version or "Unknown"}-{sha256[:8]}.{self.ext}')
+            os.replace(path, named)
+            path = named
+
+        installers = Store(location)
+        installers.add(path, sha256)
+        manifest.record(self.name, self.version, self.link, path, sha256, verified=bool(self.sha256))
+        installers.prune(manifest, self.name, store.keep_versions)
+        return path
+
+    def download(self, path: str = None):
+        print(f"\t -> {self}")
+        if App.dl_location:
+            path = os.path.join(App.dl_location, f'{self.name}_{self.version}.{self.ext}')
+
+        if not path and not App.dl_location:
+            path = f'{self.name}_{self.version}.{self.ext}'
+
+        if self.link:
+            # Made on the first chunk, so skipped apps print no empty bar
+            bars = []
+            lock = threading.Lock()
+
+            def progress(n, total):
+                with lock:
+                    if not bars:
+                        from tqdm import tqdm
+                        bars.append(tqdm(total=total or None, unit='iB', unit_scale=True))
+                    tqdm_bar = bars[0]
+                    if total and tqdm_bar.total != total:
+                        tqdm_bar.total = total
+                        tqdm_bar.refresh()
+                    tqdm_bar.update(n)
+
+            try:
+                self.fetch(path, progress=progress)
+            finally:
+                for tqdm_bar in bars:
+                    tqdm_bar.close()
+        else:
+            print('Please generate link first!')
+
+    def __str__(self) -> str:
+        v = 'v' if 'v' not in self.version else ''
+        return f'{self.name} {v}{self.version}.{self.ext}'
+
+
+# Work that can be shared between apps before they are resolved one by
+# one, currently fetching all GitHub releases in batches
+def prefetch(apps):
+    github.prefetch([app.webURL for app in apps if app.type == Type.GITHUB.value])
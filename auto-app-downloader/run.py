@@ -1,26 +1,66 @@
 import os
-import subprocess
 import sys
+import json
 import shutil
-import argparse
+import hashlib
+import subprocess
+import importlib.util
+
+# The packages live in a venv next to this script that is kept between
+# launches. It is tagged with a hash of the package list and the Python
+# version, and only rebuilt when that hash changes, so a normal launch
+# costs one file read. Wheels in `wheels/` (e.g. from `pip download -d
+# wheels requests tqdm ttkbootstrap`) are used instead of PyPI.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+env_dir = os.path.join(base_dir, 'venv')
+wheel_dir = os.path.join(base_dir, 'wheels')
+marker_file = '.requirements-hash'
+required_packages = ["requests", "tqdm", "ttkbootstrap"]
+
+
+def env_python(env_name=env_dir):
+    if os.name == 'nt':
+        return os.path.join(env_name, 'Scripts', 'python.exe')
+    return os.path.join(env_name, 'bin', 'python')
+
+
+def requirements_hash(required_packages=required_packages):
+    key = json.dumps([sorted(required_packages), list(sys.version_info[:3]), sys.platform])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def is_installed(package):
+    return importlib.util.find_spec(package) is not None
 
 
-def install_packages(required_packages=[], env_name='venv'):
-    # Check if the required packages are installed
-    not_installed = []
-    for package in required_packages:
+def env_is_current(env_name=env_dir, required_packages=required_packages):
+    try:
+        with open(os.path.join(env_name, marker_file)) as file:
+            return file.read().strip() == requirements_hash(required_packages) and os.path.isfile(env_python(env_name))
+    except OSError:
+        return False
+
+
+def install_packages(required_packages=required_packages, env_name=env_dir):
+    # The marker is written last, so a build that fails halfway is redone
+    if os.path.exists(env_name):
+        shutil.rmtree(env_name)
+    exc_silent([sys.executable, '-m', 'venv', env_name])
+
+    pip = [env_python(env_name), '-m', 'pip', 'install', '--disable-pip-version-check']
+    installed = False
+    if os.path.isdir(wheel_dir):
         try:
-            __import__(package)
-        except ImportError:
-            not_installed.append(package)
+            exc_silent(pip + ['--no-index', '--find-links', wheel_dir] + required_packages)
+            installed = True
+        except subprocess.CalledProcessError:
+            print('- Wheel cache is incomplete, using PyPI')
+    if not installed:
+        find_links = ['--find-links', wheel_dir] if os.path.isdir(wheel_dir) else []
+        exc_silent(pip + find_links + required_packages)
 
-    # If any required packages are not installed, install them in a local virtual environment
-    if not_installed:
-        exc_silent([sys.executable, '-m', 'venv', env_name])
-        exc_silent(
-            [os.path.join(env_name, 'Scripts', 'python'), '-m', 'ensurepip'])
-        exc_silent([os.path.join(env_name, 'Scripts', 'pip'),
-                   'install', '--upgrade'] + required_packages)
+    with open(os.path.join(env_name, marker_file), 'w') as file:
+        file.write(requirements_hash(required_packages))
 
 
 def exc_silent(cmds=[]):
@@ -29,51 +69,27 @@ def exc_silent(cmds=[]):
                           stderr=subprocess.STDOUT)
 
 
-def run_script(script):
-    if os.path.isfile(script):
-        subprocess.call([script], shell=True)
-    else:
-        raise FileNotFoundError(f'{script} script not found in venv/Scripts')
+# Interpreter to run the app with: this one if it already has the
+# packages, otherwise the venv, (re)built when it's missing or stale
+def select_python():
+    if all(is_installed(package) for package in required_packages):
+        return sys.executable
+    if not env_is_current():
+        print('- Installing Packages')
+        install_packages()
+    return env_python()
 
 
 def main():
-    # Script Configs
-    # if not dl_location:
     dl_location = os.path.join(os.getcwd(), 'apps')
-    env_name = 'venv'
-    script_file = os.path.join(os.getcwd(), 'gui.py')
-    venv = os.path.join(env_name, 'Scripts', 'python.exe')
-    activate_script = os.path.join(env_name, 'Scripts', 'activate.bat')
-    deactivate_script = os.path.join(env_name, 'Scripts', 'deactivate.bat')
-    required_packages = ["beautifulsoup4", "requests", "tqdm", "ttkbootstrap"]
-
-    # Install required packages
-    print('- Checking & Installing Packages')
-    install_packages(required_packages, env_name)
-
-    # Activate the virtual environment
-    print('- Activating VENV')
-    run_script(activate_script)
-
-    # Upgrade pip
-    print('- Update PIP (if available)')
-    exc_silent([venv, '-m', 'pip', 'install', '--upgrade', 'pip'])
-
-    # Run in venv
-    print('- Run Script')
-    subprocess.call([venv, script_file, dl_location])
-
-    # Deactivate the virtual environment
-    print('- Deactivating VENV')
-    run_script(deactivate_script)
+    script_file = os.path.join(base_dir, 'gui.py')
 
-    # Remove venv after done
-    print('- Removing VENV')
-    shutil.rmtree(env_name)
+    python = select_python()
+    subprocess.call([python, script_file, dl_location])
 
-    # Pause
-    subprocess.check_call(['PAUSE'])
+    # Keep the console open when started by double-click
+    if os.name == 'nt':
+        subprocess.call('PAUSE', shell=True)
 
 if __name__ == "__main__":
     main()
-    subprocess.check_call(['PAUSE'])
@@ -0,0 +1,142 @@
+import math
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+import resolver
+
+# Order in which resolved apps are downloaded:
+#   catalog    catalog order
+#   sjf        smallest first, so many small installers are done early
+#   largest    largest first, so the long downloads start right away
+#   priority   the catalog's `priority` (higher first), then catalog order
+# sjf and largest HEAD every link for its size, except for versions
+# already downloaded, and the download reuses that HEAD. Apps whose
+# size isn't known go last.
+policies = ('catalog', 'sjf', 'largest', 'priority')
+default_policy = 'sjf'
+# Seconds download workers wait for all links to resolve before
+# starting, so the first picks already follow the policy
+gather_time = 2.0
+
+
+class State(Enum):
+    QUEUED = 'Queued'
+    RESOLVING = 'Resolving'
+    READY = 'Ready'
+    DOWNLOADING = 'Downloading'
+    DONE = 'Done'
+    FAILED = 'Failed'
+    CANCELED = 'Canceled'
+
+
+def needs_size(policy: str) -> bool:
+    return policy in ('sjf', 'largest')
+
+
+def order_key(app, index: int, policy: str) -> tuple:
+    if policy == 'sjf':
+        return (app.size or math.inf, index)
+    if policy == 'largest':
+        return (-app.size if app.size else math.inf, index)
+    if policy == 'priority':
+        return (-app.priority, index)
+    return (index, index)
+
+
+# Apps sorted for download by policy, probing their sizes first when
+# the policy needs them
+def order(apps, policy: str = None, jobs: int = 8):
+    policy = policy or default_policy
+    if needs_size(policy):
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            list(executor.map(lambda app: app.probe(), apps))
+    keys = {app.name: order_key(app, index, policy) for index, app in enumerate(apps)}
+    return sorted(apps, key=lambda app: keys[app.name])
+
+
+class DownloadScheduler:
+    # Links are resolved by a pool of resolvers and pushed into a queue
+    # of ready apps, which is drained by `workers` download threads.
+    # `download(app)` does the actual transfer and returns False if it
+    # was canceled. `on_change(app, state)` is called from the worker
+    # threads whenever the state of an app changes. Ready apps are
+    # handed to workers in the order of `policy`.
+    def __init__(self, apps, download, workers: int = 4, resolvers: int = 8, on_change=None, policy: str = None):
+        self.apps = apps
+        self.policy = policy or default_policy
+        self.download = download
+        self.workers = max(1, workers)
+        self.resolvers = max(1, resolvers)
+        self.on_change = on_change
+        self.states = {app.name: State.QUEUED for app in apps}
+        self.errors = {}
+        self.ready = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.resolved = threading.Event()
+        self.canceled = threading.Event()
+
+    def set_state(self, app, state: State, error: Exception = None):
+        self.states[app.name] = state
+        if error:
+            self.errors[app.name] = error
+        if self.on_change:
+            self.on_change(app, state)
+
+    def cancel(self):
+        self.canceled.set()
+
+    def run(self):
+        threads = [threading.Thread(target=self.__worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        resolver.prefetch(self.apps)
+        with ThreadPoolExecutor(max_workers=self.resolvers) as executor:
+            for index, app in enumerate(self.apps):
+                executor.submit(self.__resolve, app, index)
+        self.resolved.set()
+
+        # One stop signal for each worker, sorted after all the apps
+        for _ in threads:
+            self.ready.put((math.inf, math.inf, math.inf, None))
+        for thread in threads:
+            thread.join()
+
+    def __resolve(self, app, index: int):
+        if self.canceled.is_set():
+            self.set_state(app, State.CANCELED)
+            return
+
+        self.set_state(app, State.RESOLVING)
+        try:
+            app.generate_link()
+            if not app.link:
+                raise ValueError('Failed to generate link')
+        except Exception as e:
+            self.set_state(app, State.FAILED, e)
+            return
+
+        if needs_size(self.policy):
+            app.probe()
+        self.set_state(app, State.READY)
+        self.ready.put(order_key(app, index, self.policy) + (next(self.sequence), app))
+
+    def __worker(self):
+        self.resolved.wait(gather_time)
+        while True:
+            app = self.ready.get()[-1]
+            if app is None:
+                break
+            if self.canceled.is_set():
+                self.set_state(app, State.CANCELED)
+                continue
+
+            self.set_state(app, State.DOWNLOADING)
+            try:
+                completed = self.download(app)
+            except Exception as e:
+                self.set_state(app, State.FAILED, e)
+                continue
+            self.set_state(app, State.DONE if completed else State.CANCELED)
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+# Content-addressed installer store. Every downloaded file is moved to
+# `.store/sha256/<ab>/<hash>` inside the download location and the
+# human-readable `{name}_{version}.{ext}` is a hardlink to it (or a
+# symlink/copy where hardlinks aren't possible). Identical bytes are
+# stored once, whatever version string they were downloaded under.
+store_dir = os.path.join('.store', 'sha256')
+# Versions kept per app by prune()
+keep_versions = 3
+
+
+class Store:
+    def __init__(self, root: str):
+        self.root = root
+        self.blobs = os.path.join(root, store_dir)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blobs, sha256[:2], sha256)
+
+    def has(self, sha256: str) -> bool:
+        return os.path.isfile(self.blob_path(sha256))
+
+    # Move a downloaded file into the store and link it back at path
+    def add(self, path: str, sha256: str) -> str:
+        blob = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if os.path.isfile(blob):
+            os.remove(path)
+        else:
+            os.replace(path, blob)
+        self.link(blob, path)
+        return blob
+
+    def link(self, blob: str, path: str):
+        if os.path.lexists(path):
+            os.remove(path)
+        try:
+            os.link(blob, path)
+            return
+        except OSError:
+            pass
+        try:
+            os.symlink(os.path.relpath(blob, os.path.dirname(path)), path)
+        except OSError:
+            shutil.copyfile(blob, path)
+
+    # Keep the newest `keep` distinct files of an app. Older ones lose
+    # their readable names, and their blobs are deleted once no readable
+    # name of any app refers to them anymore. The newest file, the one
+    # just recorded, is always kept.
+    def prune(self, manifest, app: str, keep: int = keep_versions):
+        keep = max(keep, 1)
+        history = manifest.history(app)
+        kept, old = [], []
+        for row in reversed(history):
+            if row['sha256'] not in kept and row['sha256'] not in old:
+                (kept if len(kept) < keep else old).append(row['sha256'])
+        if not old:
+            return
+
+        kept_paths = {row['path'] for row in history if row['sha256'] in kept}
+        for row in history:
+            if row['sha256'] in old and row['path'] not in kept_paths and os.path.lexists(row['path']):
+                os.remove(row['path'])
+
+        for sha256 in old:
+            rows = manifest.with_sha256(sha256)
+            if self.has(sha256) and not any(os.path.lexists(row['path']) for row in rows):
+                os.remove(self.blob_path(sha256))
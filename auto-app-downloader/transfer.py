@@ -0,0 +1,389 @@
+import os
+import json
+import errno
+import shutil
+import hashlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import transport
+import metrics
+
+# Reads start at block_size and double up to max_block_size while a
+# read takes less than target_read_time, so fast links get big reads
+# (little per-chunk overhead) and slow ones still report progress and
+# notice a cancel often enough.
+block_size = 64 * 1024 # 64 Kibibytes
+max_block_size = 4 * 1024 * 1024 # 4 Mebibytes
+target_read_time = 0.05
+# Number of parallel ranges a large file is split into
+default_segments = 4
+# Files smaller than this are always fetched over a single stream
+min_segment_size = 16 * 1024 * 1024
+# How often the .part sidecar is flushed while downloading (seconds)
+save_interval = 1.0
+# Cap on the combined speed of all downloads in bytes per second,
+# 0 for no limit
+rate_limit = 0
+
+
+class RangeNotSupported(Exception):
+    pass
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+class TokenBucket:
+    # Shared by all download threads. Every read takes its size in
+    # tokens, which refill at `rate` per second up to one second's
+    # worth; a read that overdraws the bucket sleeps until it's repaid.
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, n: int):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+# Bucket for the current rate_limit, None when there is no limit
+def limiter():
+    global _bucket
+    with _bucket_lock:
+        if rate_limit <= 0:
+            return None
+        if _bucket is None or _bucket.rate != rate_limit:
+            _bucket = TokenBucket(rate_limit)
+        return _bucket
+
+
+class Hasher:
+    # SHA-256 of a file computed while it is written. Bytes must be fed
+    # in order, so only the first range is hashed inline; whatever was
+    # not fed that way is read back from disk by finish().
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.position = 0
+
+    def update(self, data):
+        self.sha256.update(data)
+        self.position += len(data)
+
+    def feed_file(self, path: str, end: int = None):
+        with open(path, 'rb') as file:
+            file.seek(self.position)
+            while end is None or self.position < end:
+                size = 1024 * 1024 if end is None else min(1024 * 1024, end - self.position)
+                data = file.read(size)
+                if not data:
+                    break
+                self.update(data)
+
+    def finish(self, path: str) -> str:
+        self.feed_file(path)
+        return self.sha256.hexdigest()
+
+
+class Probe:
+    # What a HEAD request tells about a download link
+    def __init__(self, url: str, size: int = 0, ranges: bool = False, etag: str = '', last_modified: str = ''):
+        self.url = url
+        self.size = size
+        self.ranges = ranges
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def validator(self) -> str:
+        # Weak ETags can't be used with If-Range
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+
+    @property
+    def resumable(self) -> bool:
+        return self.ranges and self.size > 0 and bool(self.validator)
+
+
+# Reserve size bytes for file, failing early when the disk is too small
+def preallocate(file, size: int):
+    free = shutil.disk_usage(os.path.dirname(os.path.abspath(file.name))).free
+    if free < size:
+        raise OSError(errno.ENOSPC, f'{size} bytes needed but only {free} free', file.name)
+    if hasattr(os, 'posix_fallocate'):
+        os.posix_fallocate(file.fileno(), 0, size)
+    else:
+        file.truncate(size)
+
+
+# Body of a streamed response as views into one reused buffer. A view
+# is only valid until the next one is produced.
+def _is_encoded(response) -> bool:
+    return response.headers.get('content-encoding', 'identity').lower() != 'identity'
+
+
+def _chunks(response):
+    bucket = limiter()
+    # Under a rate limit, reads stay small enough to keep the flow even
+    largest = min(max_block_size, max(block_size, bucket.rate // 10)) if bucket else max_block_size
+
+    if _is_encoded(response):
+        # Compressed bodies have to go through urllib3's decoder
+        for data in response.iter_content(largest):
+            if bucket:
+                bucket.consume(len(data))
+            yield data
+        return
+
+    view = memoryview(bytearray(largest))
+    size = block_size
+    while True:
+        started = time.monotonic()
+        n = response.raw.readinto(view[:size])
+        if not n:
+            break
+        if bucket:
+            bucket.consume(n)
+        yield view[:n]
+
+        elapsed = time.monotonic() - started
+        if elapsed < target_read_time and size < largest:
+            size *= 2
+        elif elapsed > 2 * target_read_time and size > block_size:
+            size //= 2
+
+
+def probe(url: str) -> Probe:
+    try:
+        response = transport.head(url, allow_redirects=True)
+        response.close()
+    except Exception:
+        return Probe(url)
+    if not response.ok:
+        return Probe(url)
+    return Probe(
+        response.url,
+        int(response.headers.get('content-length', 0)),
+        response.headers.get('accept-ranges', '').lower() == 'bytes',
+        response.headers.get('etag', ''),
+        response.headers.get('last-modified', ''),
+    )
+
+
+class PartFile:
+    # A download in progress is written to `{path}.part`, and a
+    # `{path}.part.json` sidecar records the url, validators and the
+    # bytes written to each range, so that it can be resumed later.
+    def __init__(self, path: str):
+        self.path = path + '.part'
+        self.sidecar = self.path + '.json'
+        self.lock = threading.Lock()
+        self.last_save = 0.0
+        self.info = {}
+
+    def load(self) -> dict:
+        try:
+            with open(self.sidecar) as file:
+                info = json.load(file)
+            if os.path.getsize(self.path) == info['size']:
+                return info
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def start(self, info: Probe, ranges):
+        self.info = {
+            'url': info.url,
+            'etag': info.etag,
+            'last_modified': info.last_modified,
+            'size': info.size,
+            'segments': [[start, end, 0] for start, end in ranges],
+        }
+        with open(self.path, 'wb') as file:
+            preallocate(file, info.size)
+        self.save()
+
+    def resume(self, info: dict):
+        self.info = info
+
+    def advance(self, index: int, n: int):
+        with self.lock:
+            self.info['segments'][index][2] += n
+            if time.monotonic() - self.last_save >= save_interval:
+                self.__save()
+
+    def save(self):
+        with self.lock:
+            self.__save()
+
+    def __save(self):
+        tmp = self.sidecar + '.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(self.info, file)
+        os.replace(tmp, self.sidecar)
+        self.last_save = time.monotonic()
+
+    @property
+    def written(self) -> int:
+        return sum(segment[2] for segment in self.info['segments'])
+
+    def complete(self, path: str):
+        os.replace(self.path, path)
+        self.discard_sidecar()
+
+    def discard_sidecar(self):
+        if os.path.exists(self.sidecar):
+            os.remove(self.sidecar)
+
+    def discard(self):
+        self.discard_sidecar()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# Download url into path. `progress(n, total)` is called with the
+# number of bytes written by each chunk and `should_cancel()` is
+# polled between chunks. Returns the SHA-256 of the file, or None if
+# the download was canceled. When `expected_sha256` is given and
+# doesn't match, the file is deleted and ChecksumMismatch is raised.
+#
+# Large files on servers that accept ranges are split into `segments`
+# ranges (default_segments unless given) fetched in parallel into a
+# preallocated file, otherwise the file is pulled over a single stream.
+# Data goes to a .part file that is renamed to path once complete; a
+# canceled or failed download is resumed on the next call while the
+# server validator still matches. `info` is a probe of url made just
+# before, which saves asking the server again.
+def download(url: str, path: str, progress=None, should_cancel=None, segments: int = None, expected_sha256: str = None, info: Probe = None):
+    segments = segments if segments is not None else default_segments
+    part = PartFile(path)
+    info = info or probe(url)
+
+    sha256 = None
+    if info.resumable:
+        try:
+            sha256 = _download_ranges(info, part, progress, should_cancel, segments)
+            if not sha256:
+                return None
+        except RangeNotSupported:
+            part.discard()
+    if not sha256:
+        sha256 = _download_single(url, part, progress, should_cancel)
+        if not sha256:
+            return None
+
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        part.discard()
+        raise ChecksumMismatch(f'{url} has SHA-256 {sha256}, expected {expected_sha256}')
+    part.complete(path)
+    return sha256
+
+
+def _download_single(url, part, progress, should_cancel):
+    part.discard_sidecar()
+    hasher = Hasher()
+    completed = False
+    try:
+        with transport.get(url, stream=True) as response:
+            response.raise_for_status()
+            total_size = int(response.headers.get('content-length', 0))
+            # Content-Length of a compressed body isn't the file size
+            exact_size = total_size if not _is_encoded(response) else 0
+            with open(part.path, 'wb') as file:
+                if exact_size:
+                    preallocate(file, exact_size)
+                for data in _chunks(response):
+                    if should_cancel and should_cancel():
+                        return None
+                    file.write(data)
+                    hasher.update(data)
+                    if progress:
+                        progress(len(data), total_size)
+            if exact_size and hasher.position != exact_size:
+                raise IOError(f'{url} ended after {hasher.position} of {total_size} bytes')
+        completed = True
+    finally:
+        # Without range support there is nothing to resume from
+        if not completed:
+            part.discard()
+    return hasher.sha256.hexdigest()
+
+
+def _split(size: int, count: int):
+    step = -(-size // count)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def _download_ranges(info, part, progress, should_cancel, count):
+    previous = part.load()
+    if (previous.get('url') == info.url and previous.get('size') == info.size
+            and (previous.get('etag'), previous.get('last_modified')) == (info.etag, info.last_modified)):
+        part.resume(previous)
+        if progress and part.written:
+            progress(part.written, info.size)
+    else:
+        count = count if info.size >= min_segment_size else 1
+        part.start(info, _split(info.size, max(1, count)))
+
+    canceled = threading.Event()
+    hasher = Hasher()
+
+    def fetch(index):
+        start, end, written = part.info['segments'][index]
+        # The first range is hashed inline, after what is already on disk
+        inline = index == 0
+        if inline:
+            hasher.feed_file(part.path, start + written)
+        if start + written > end:
+            return
+        headers = {'Range': f'bytes={start + written}-{end}', 'If-Range': info.validator}
+        with transport.get(info.url, headers=headers, stream=True) as response:
+            if response.status_code != 206:
+                raise RangeNotSupported(f'{info.url} answered {response.status_code} to a range request')
+            # Unbuffered, so the bytes counted in the sidecar are
+            # always in the file even if the process is killed
+            with open(part.path, 'r+b', buffering=0) as file:
+                file.seek(start + written)
+                for data in _chunks(response):
+                    if canceled.is_set() or (should_cancel and should_cancel()):
+                        canceled.set()
+                        return
+                    file.write(data)
+                    if inline:
+                        hasher.update(data)
+                    part.advance(index, len(data))
+                    if progress:
+                        progress(len(data), info.size)
+        start, end, written = part.info['segments'][index]
+        if start + written <= end:
+            raise IOError(f'Range {start}-{end} of {info.url} ended after {written} bytes')
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(part.info['segments'])) as executor:
+            futures = [executor.submit(metrics.bind(fetch), index) for index in range(len(part.info['segments']))]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                canceled.set()
+                raise
+    finally:
+        part.save()
+
+    if canceled.is_set():
+        return None
+    return hasher.finish(part.path)
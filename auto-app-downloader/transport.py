@@ -0,0 +1,226 @@
+from __future__ import annotations
+import time
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlsplit
+import metrics
+
+# Every request made by the resolvers and downloads goes through
+# a single pooled session, so connections (DNS, TCP and TLS) are
+# kept alive and reused between GitHub API hits, page scrapes and
+# installer downloads.
+
+# Number of hosts to keep a connection pool for
+pool_connections = 32
+# Max keep-alive connections to a single host. Requests beyond this
+# limit wait for a free connection instead of opening a new one.
+pool_maxsize = 8
+
+# Seconds to wait for a connection, and between bytes of a response.
+# Used for every request that doesn't pass its own timeout.
+connect_timeout = 10
+read_timeout = 30
+
+# Idempotent requests are retried this many times on connection
+# errors, timeouts and the statuses below, waiting a random time of
+# up to backoff * 2^attempt seconds (capped at max_backoff) in between
+retries = 3
+backoff = 0.5
+max_backoff = 8
+retry_statuses = (429, 500, 502, 503, 504)
+idempotent = ('GET', 'HEAD', 'OPTIONS')
+
+# After this many failures in a row a host is skipped for
+# breaker_cooldown seconds, then one request is let through to see
+# whether it came back
+breaker_threshold = 5
+breaker_cooldown = 60
+
+# Requests made with hedge=True send a second copy if the first hasn't
+# answered after this many seconds and use whichever answers first.
+# 0 disables hedging.
+hedge_delay = 0
+
+user_agent = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/113.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+}
+
+_session = None
+_lock = threading.Lock()
+_requests = Counter()
+_breakers = {}
+_hedge_executor = None
+
+
+class CircuitOpen(ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened_until = 0.0
+
+    # Called with _lock held
+    def allow(self) -> bool:
+        if self.failures < breaker_threshold:
+            return True
+        now = time.monotonic()
+        if now < self.opened_until:
+            return False
+        # Let this request through as the trial, the rest keep failing
+        # fast until it completes
+        self.opened_until = now + breaker_cooldown
+        return True
+
+    def success(self):
+        self.failures = 0
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= breaker_threshold:
+            self.opened_until = time.monotonic() + breaker_cooldown
+
+
+def configure(connections: int = None, maxsize: int = None):
+    # Change the pool limits, the session is rebuilt on next use
+    global pool_connections, pool_maxsize, _session
+    with _lock:
+        if connections:
+            pool_connections = connections
+        if maxsize:
+            pool_maxsize = maxsize
+        if _session:
+            _session.close()
+        _session = None
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            # requests is only loaded once something goes on the network
+            import requests
+            from connections import TimedAdapter
+            session = requests.Session()
+            session.headers.update(user_agent)
+            adapter = TimedAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def _delay(attempt: int, response: requests.Response = None) -> float:
+    retry_after = response.headers.get('retry-after', '') if response is not None else ''
+    if retry_after.isdigit():
+        return min(int(retry_after), max_backoff)
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+def _send(method: str, url: str, **kwargs) -> requests.Response:
+    import requests
+    host = urlsplit(url).hostname
+    kwargs.setdefault('timeout', (connect_timeout, read_timeout))
+    attempts = retries + 1 if method.upper() in idempotent else 1
+
+    for attempt in range(attempts):
+        with _lock:
+            breaker = _breakers.setdefault(host, CircuitBreaker())
+            if not breaker.allow():
+                raise CircuitOpen(f'{host} is failing, skipping it for now')
+            _requests[host] += 1
+
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            metrics.add('requests', 1)
+            with _lock:
+                breaker.failure()
+            if attempt + 1 == attempts:
+                raise
+            time.sleep(_delay(attempt))
+            continue
+
+        metrics.add('requests', 1 + len(response.history))
+        metrics.add('redirects', len(response.history))
+        metrics.add('ttfb', sum(r.elapsed.total_seconds() for r in response.history + [response]))
+
+        # 429 means the host is up, just busy
+        with _lock:
+            if response.status_code >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+        if response.status_code not in retry_statuses or attempt + 1 == attempts:
+            return response
+        response.close()
+        time.sleep(_delay(attempt, response))
+
+
+def _close(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _hedged(method: str, url: str, **kwargs) -> requests.Response:
+    global _hedge_executor
+    with _lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix='hedge')
+        executor = _hedge_executor
+
+    send = metrics.bind(_send)
+    first = executor.submit(send, method, url, **kwargs)
+    done, _ = wait([first], timeout=hedge_delay)
+    if done:
+        return first.result()
+
+    futures = [first, executor.submit(send, method, url, **kwargs)]
+    error = None
+    for future in as_completed(futures):
+        if future.exception() is None:
+            # The slower copy is closed whenever it finishes
+            for other in futures:
+                if other is not future:
+                    other.add_done_callback(_close)
+            return future.result()
+        error = future.exception()
+    raise error
+
+
+# Requests with hedge=True are safe to send twice and worth getting
+# back quickly, like the page scrapes and API calls of resolvers
+def request(method: str, url: str, hedge: bool = False, **kwargs) -> requests.Response:
+    if hedge and hedge_delay and method.upper() in idempotent:
+        return _hedged(method, url, **kwargs)
+    return _send(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    return request('HEAD', url, **kwargs)
+
+
+# Requests made and connections opened per host. Anything above one
+# connection per host means requests ran in parallel or keep-alive
+# could not be used.
+def stats() -> dict:
+    connections = Counter()
+    session = _session
+    if session:
+        pools = session.get_adapter('https://').poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool:
+                connections[key.key_host] += pool.num_connections
+    return {
+        host: {'requests': count, 'connections': connections.get(host, 0)}
+        for host, count in _requests.items()
+    }
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import random
+import signal
+import threading
+import metrics
+from manifest import unversioned
+from scheduler import DownloadScheduler, State
+
+# Long-running mode: every app is re-resolved on its own schedule and
+# only downloaded when it changed. Each app waits its interval (the
+# catalog's `interval` in hours, or the default below) stretched or
+# shrunk by a random jitter, so checks of different vendors drift apart
+# instead of all firing together.
+#
+# The schedule lives in `watch.json` in the download location, next to
+# the manifest, so a restarted watcher picks up where it stopped. The
+# same file is the status of the daemon for anything monitoring it.
+state_filename = 'watch.json'
+# Seconds between checks of an app
+interval = 6 * 3600
+# Fraction of the interval each check may move by
+jitter = 0.1
+# Failed checks are retried after at most this many seconds
+retry_interval = 30 * 60
+# Apps seen for the first time are checked within this many seconds
+startup_spread = 60
+
+
+class Watcher:
+    def __init__(self, apps, dl_location: str, workers: int = 2, resolvers: int = 8):
+        self.apps = apps
+        self.workers = workers
+        self.resolvers = resolvers
+        os.makedirs(dl_location, exist_ok=True)
+        self.path = os.path.join(dl_location, state_filename)
+        self.stopping = threading.Event()
+        self.scheduler = None
+        self.status = 'starting'
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+        self.entries = self.load()
+        now = time.time()
+        for app in apps:
+            self.entries.setdefault(app.name, {'next_check': now + random.uniform(0, startup_spread)})
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file).get('apps', {})
+        except (OSError, ValueError):
+            return {}
+
+    # Written to a temporary file first so a reader never sees half of it
+    def save(self):
+        data = {
+            'pid': os.getpid(),
+            'status': self.status,
+            'started': self.started,
+            'updated': time.time(),
+            'apps': self.entries,
+        }
+        with self.lock:
+            temp = self.path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=2)
+            os.replace(temp, self.path)
+
+    def next_check(self, app, failed: bool = False) -> float:
+        seconds = app.interval * 3600 if app.interval else interval
+        if failed:
+            seconds = min(seconds, retry_interval)
+        return time.time() + seconds * random.uniform(1 - jitter, 1 + jitter)
+
+    def stop(self, *args):
+        if not self.stopping.is_set():
+            print('Stopping, waiting for running downloads to pause...')
+        self.stopping.set()
+        if self.scheduler:
+            self.scheduler.cancel()
+
+    def run(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        while not self.stopping.is_set():
+            now = time.time()
+            due = [app for app in self.apps if self.entries[app.name]['next_check'] <= now]
+            if due:
+                self.check(due)
+
+            self.status = 'idle'
+            self.save()
+            wake = min(self.entries[app.name]['next_check'] for app in self.apps)
+            self.stopping.wait(max(wake - time.time(), 1))
+
+        self.status = 'stopped'
+        self.save()
+
+    def check(self, apps):
+        print(f'Checking {", ".join(app.name for app in apps)}')
+        for app in apps:
+            # Resolvers only set what they find, so drop the last result
+            app.link, app.version, app.sha256, app.size = '', '', '', 0
+
+        self.status = 'checking'
+        self.scheduler = DownloadScheduler(apps, self.download, self.workers, self.resolvers, on_change=self.on_change)
+        if self.stopping.is_set():
+            self.scheduler.cancel()
+        self.scheduler.run()
+
+        now = time.time()
+        for app in apps:
+            state = self.scheduler.states[app.name]
+            if state == State.CANCELED:
+                continue  # Still due, checked again after a restart
+            entry = self.entries[app.name]
+            error = self.scheduler.errors.get(app.name)
+            entry['last_check'] = now
+            entry['error'] = str(error) if error else ''
+            entry['next_check'] = self.next_check(app, failed=state == State.FAILED)
+            if state == State.DONE:
+                entry['version'] = app.version
+                entry['link'] = app.link
+        self.scheduler = None
+        metrics.write_prometheus()
+
+    def on_change(self, app, state):
+        with self.lock:
+            self.entries[app.name]['result'] = state.value
+        self.save()
+
+    # Runs on a scheduler worker. Versioned apps are skipped by the
+    # manifest; an unversioned link only counts as changed when its
+    # ETag or Last-Modified did.
+    def download(self, app):
+        entry = self.entries[app.name]
+        validator = ''
+        if app.version in unversioned:
+            if not app.link_info:
+                app.probe()
+            validator = app.link_info.validator
+            if validator and validator == entry.get('validator') and app.link == entry.get('link'):
+                print(f'{app.name} has not changed')
+                return True
+
+        path = app.fetch(app.default_path(), should_cancel=self.stopping.is_set)
+        if path and validator:
+            with self.lock:
+                entry['validator'] = validator
+        return bool(path)